@@ -1,17 +1,260 @@
+import atexit
 import os
+import queue
+import threading
 from datetime import datetime
 import json
 from pathlib import Path
 from icecream import ic
 
+# Turns are appended to battle_log.jsonl as they happen: a metadata record
+# first, then one record per logged turn or turn update. Each write is a
+# single line, so the cost per turn doesn't grow with the game and a crash
+# only loses records not yet written, never the lines before them. end_game() compacts the stream
+# into battle_log.json (written to a temp file, then renamed into place)
+# and removes the stream.
+#
+# The file I/O itself runs on a LogWriter thread shared by every logger in
+# the process, so a slow disk never stalls choose_move on the event loop.
+
+LOG_FILE = "battle_log.json"
+STREAM_FILE = "battle_log.jsonl"
+# Records waiting for the writer thread before log calls block
+DEFAULT_QUEUE_SIZE = 10000
+# Records written per batch; each batch ends with one fsync per file
+MAX_BATCH = 256
+
+def _count_turn(metadata, turn_data):
+    """Update the metadata move counters for a logged turn."""
+    metadata["total_move_count"] += 1
+    if turn_data["is_random_move"]:
+        metadata["random_move_count"] += 1
+    if turn_data["decision_source"].startswith("fallback"):
+        metadata["fallback_move_count"] += 1
+    if turn_data["decision_source"] == "fast_path":
+        metadata["fast_path_move_count"] += 1
+
+def _update_turn(turns, turn_number, fields):
+    """Apply a turn update to the latest entry for that turn. Returns whether one was found."""
+    for turn_data in reversed(turns):
+        if turn_data["turn_number"] == turn_number:
+            turn_data.update(fields)
+            return True
+    return False
+
+def read_stream(stream_path):
+    """
+    Rebuild a game from its turn stream, e.g. one left behind by a crash.
+    A partially written last line is ignored.
+
+    Returns:
+        dict: The game in battle_log.json form, None if the stream has no metadata
+    """
+    game_data = None
+    with open(stream_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record["type"] == "metadata":
+                game_data = {"metadata": record["metadata"], "turns": []}
+            elif game_data is None:
+                continue
+            elif record["type"] == "turn":
+                game_data["turns"].append(record["turn"])
+                _count_turn(game_data["metadata"], record["turn"])
+            elif record["type"] == "update":
+                _update_turn(game_data["turns"], record["turn_number"], record["fields"])
+    return game_data
+
+def write_log_atomically(log_path, game_data):
+    """Write a battle_log.json so readers see either the old file or the complete new one."""
+    log_path = Path(log_path)
+    temp_path = log_path.with_name(log_path.name + ".tmp")
+    with open(temp_path, "w") as f:
+        json.dump(game_data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, log_path)
+
+def recover_logs(base_dir="logs"):
+    """
+    Compact turn streams of games that never reached end_game(), so they
+    show up in stats like any other log. Only run this while no battles are
+    being played, or live games will be compacted too.
+
+    Returns:
+        int: Number of logs recovered
+    """
+    recovered = 0
+    for stream_path in Path(base_dir).glob(f"**/{STREAM_FILE}"):
+        log_path = stream_path.with_name(LOG_FILE)
+        # Never overwrite a finished log
+        if log_path.exists():
+            continue
+        game_data = read_stream(stream_path)
+        if game_data is not None:
+            write_log_atomically(log_path, game_data)
+            stream_path.unlink()
+            recovered += 1
+    return recovered
+
+class LogWriter:
+    def __init__(self, max_queue=DEFAULT_QUEUE_SIZE, max_batch=MAX_BATCH):
+        """
+        Background thread that performs log writes in order. Queued records
+        are written in batches, with one fsync per file per batch.
+
+        Args:
+            max_queue (int): Records queued at most. Once full, callers block
+                until the writer catches up (backpressure) instead of using
+                unbounded memory.
+            max_batch (int): Records written per batch
+        """
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=max_queue)
+        # Open turn streams, kept open between batches
+        self._files = {}
+        self._thread = threading.Thread(target=self._run, name="battle-log-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, stream_path, line):
+        """Queue a line to be appended to a turn stream."""
+        self._queue.put(("append", stream_path, line))
+
+    def compact(self, stream_path, log_path, game_data):
+        """
+        Queue compaction of a finished game, after every write already queued for it.
+
+        Returns:
+            threading.Event: Set once battle_log.json is written
+        """
+        done = threading.Event()
+        self._queue.put(("compact", stream_path, log_path, game_data, done))
+        return done
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is written and synced. Returns False on timeout."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Write everything still queued, close the streams and stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(("stop", None))
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not self._write_batch(batch):
+                return
+
+    def _write_batch(self, batch):
+        """Perform a batch of records. Returns False once the writer should stop."""
+        dirty = set()
+        running = True
+        for kind, *args in batch:
+            try:
+                if kind == "append":
+                    stream_path, line = args
+                    stream = self._files.get(stream_path)
+                    if stream is None:
+                        stream = self._files[stream_path] = open(stream_path, "a")
+                    stream.write(line)
+                    dirty.add(stream_path)
+                elif kind == "compact":
+                    stream_path, log_path, game_data, done = args
+                    try:
+                        self._close_stream(stream_path)
+                        dirty.discard(stream_path)
+                        write_log_atomically(log_path, game_data)
+                        Path(stream_path).unlink(missing_ok=True)
+                    finally:
+                        done.set()
+                elif kind == "flush":
+                    # Everything before a flush must be on disk when it returns
+                    try:
+                        self._sync(dirty)
+                        dirty.clear()
+                    finally:
+                        args[0].set()
+                else:
+                    running = False
+                    dirty.clear()
+                    for stream_path in list(self._files):
+                        try:
+                            self._close_stream(stream_path)
+                        except Exception as e:
+                            ic(f"Error closing battle log {stream_path}: {e}")
+            except Exception as e:
+                ic(f"Error writing battle log: {e}")
+        self._sync(dirty)
+        return running
+
+    def _sync(self, stream_paths):
+        """Flush and fsync streams. A failing file is reported, so I/O errors never stop the writer."""
+        for stream_path in stream_paths:
+            stream = self._files.get(stream_path)
+            if stream is None:
+                continue
+            try:
+                stream.flush()
+                os.fsync(stream.fileno())
+            except Exception as e:
+                ic(f"Error syncing battle log {stream_path}: {e}")
+
+    def _close_stream(self, stream_path):
+        stream = self._files.pop(stream_path, None)
+        if stream is not None:
+            try:
+                stream.flush()
+                os.fsync(stream.fileno())
+            finally:
+                stream.close()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_log_writer():
+    """
+    Get the process-wide log writer, starting its thread on first use. It is
+    closed at interpreter exit, after writing everything still queued.
+
+    Returns:
+        LogWriter: The shared writer
+    """
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LogWriter()
+                atexit.register(_writer.close)
+    return _writer
+
 class BattleLogger:
-    def __init__(self, base_dir="logs"):
-        """Initialize the battle logger with a base directory for logs."""
+    def __init__(self, base_dir="logs", writer=None):
+        """
+        Initialize the battle logger with a base directory for logs.
+
+        Args:
+            base_dir (str): Directory game logs are written under
+            writer (LogWriter): Writer thread to use, defaults to the shared one
+        """
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(exist_ok=True)
         self.current_game_file = None
         self.current_game_data = None
         self.model_name = None
+        self._writer = writer
+        self._stream_path = None
 
     def start_new_game(self, game_type, model_name, player_name):
         """
@@ -37,16 +280,21 @@ class BattleLogger:
                 "llm_model": self.model_name,
                 "player_name": player_name,
                 "random_move_count": 0,
+                "fallback_move_count": 0,
+                "fast_path_move_count": 0,
                 "total_move_count": 0,
                 "player_name": player_name
             },
             "turns": []
         }
         
-        self.current_game_file = game_dir / "battle_log.json"
-        self._save_current_game()
+        self.current_game_file = game_dir / LOG_FILE
+        self._stream_path = game_dir / STREAM_FILE
+        self._append({"type": "metadata", "metadata": self.current_game_data["metadata"]})
 
-    def log_turn(self, turn_number, battle_state, thought, action_type, action_name, is_random=False, consensus=None, voting=None):
+    def log_turn(self, turn_number, battle_state, thought, action_type, action_name, is_random=False, consensus=None, voting=None,
+                 llm_calls=None, decision_time=None, decision_source="llm", reasks=0,
+                 samples_used=None, vote_distribution=None, decision_tier=None):
         """
         Log a single turn of the battle.
         
@@ -57,6 +305,14 @@ class BattleLogger:
             action_type (str): Type of action taken (move/switch)
             action_name (str): Name of the specific action
             is_random (bool): Whether this was a random move or not
+            llm_calls (list): Per-call LLM telemetry (wall time, tokens, model, retries)
+            decision_time (float): Seconds from the start of choose_move to the decision
+            decision_source (str): What made the decision: 'llm', 'fallback_timeout',
+                'fallback_error', 'fallback_invalid', 'fast_path' or 'random'
+            reasks (int): Times the LLM was asked again after an illegal action
+            samples_used (int): Self-consistency samples drawn this turn
+            vote_distribution (dict): Votes per legal action name
+            decision_tier (str): Cascade tier that decided: 'base' or 'escalated'
         """
         if self.current_game_data is None:
             raise ValueError("No active game logging session. Call start_new_game first.")
@@ -70,19 +326,45 @@ class BattleLogger:
             "is_random_move": is_random,
             "timestamp": datetime.now().isoformat(),
             "consensus": consensus,
-            "voting": voting
+            "voting": voting,
+            "llm_calls": llm_calls,
+            "decision_time": decision_time,
+            "decision_source": decision_source,
+            "reasks": reasks,
+            "samples_used": samples_used,
+            "vote_distribution": vote_distribution,
+            "decision_tier": decision_tier
         }
         
         # Update metadata counters
-        self.current_game_data["metadata"]["total_move_count"] += 1
-        if is_random:
-            self.current_game_data["metadata"]["random_move_count"] += 1
-        
+        _count_turn(self.current_game_data["metadata"], turn_data)
+
         self.current_game_data["turns"].append(turn_data)
-        self._save_current_game()
+        self._append({"type": "turn", "turn": turn_data})
+
+    def update_turn(self, turn_number, **fields):
+        """
+        Update fields of an already logged turn, e.g. a Thought that finished
+        streaming after the order was sent. Ignored once the game has ended.
+
+        Args:
+            turn_number (int): Turn to update; the latest entry for it is used
+            **fields: Turn fields to overwrite
+        """
+        if self.current_game_data is None:
+            return
+
+        if _update_turn(self.current_game_data["turns"], turn_number, fields):
+            self._append({"type": "update", "turn_number": turn_number, "fields": fields})
 
     def end_game(self, outcome, final_rank=None):
-        """End the current game logging session."""
+        """
+        End the current game logging session. The log is compacted on the
+        writer thread after the game's pending writes.
+
+        Returns:
+            threading.Event: Set once battle_log.json is written, see flush()
+        """
         if self.current_game_data is None:
             raise ValueError("No active game logging session. Call start_new_game first.")
         
@@ -96,16 +378,37 @@ class BattleLogger:
         random_moves = self.current_game_data["metadata"]["random_move_count"]
         random_move_percentage = (random_moves / total_moves * 100) if total_moves > 0 else 0
         self.current_game_data["metadata"]["random_move_percentage"] = round(random_move_percentage, 2)
+        fallback_moves = self.current_game_data["metadata"]["fallback_move_count"]
+        fallback_move_percentage = (fallback_moves / total_moves * 100) if total_moves > 0 else 0
+        self.current_game_data["metadata"]["fallback_move_percentage"] = round(fallback_move_percentage, 2)
         
-        self._save_current_game()
-        
+        done = self._compact()
+
         self.current_game_data = None
         self.current_game_file = None
+        return done
+
+    def flush(self, timeout=None):
+        """Wait until every log write queued so far, from any logger, is on disk."""
+        return self._get_writer().flush(timeout)
+
+    def _get_writer(self):
+        if self._writer is None:
+            self._writer = get_log_writer()
+        return self._writer
 
-    def _save_current_game(self):
-        """Save the current game data to file."""
-        if self.current_game_file is None:
+    def _append(self, record):
+        """Queue one record for the current game's turn stream."""
+        if self._stream_path is None:
             raise ValueError("No active game file.")
-        
-        with open(self.current_game_file, 'w') as f:
-            json.dump(self.current_game_data, f, indent=2)
\ No newline at end of file
+        # Serialized now, since the turn dicts may still change before the write
+        self._get_writer().append(self._stream_path, json.dumps(record) + "\n")
+
+    def _compact(self):
+        """Queue writing the finished game to battle_log.json and removing its turn stream."""
+        stream_path = self._stream_path
+        self._stream_path = None
+        return self._get_writer().compact(stream_path, self.current_game_file, self.current_game_data)
+
+if __name__ == "__main__":
+    ic(recover_logs())
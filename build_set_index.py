@@ -0,0 +1,110 @@
+from collections import Counter, defaultdict
+import argparse
+import re
+from icecream import ic
+from stats import get_battle_logs
+from prompts.utils import parse_available_actions
+from prompts.set_index import write_set_index, DEFAULT_INDEX_PATH
+
+# Builds the opponent set index (prompts/set_index.py) from the battle logs.
+# Opponent species and abilities come from the OPPONENT STATUS block of each
+# logged battle state, moves and items from the rule-based turn summaries
+# ('Garchomp used Earthquake.'). LLM-written summaries don't follow a fixed
+# wording and are skipped. Each feature counts once per battle.
+
+USED_MOVE = re.compile(r"(?:^|\. )([^.]+?) used ([^.,]+?)(?: against [^.,]+)?(?:, but it missed)?\.")
+REVEALED_ITEM = re.compile(r"(?:^|\. )([^.]+?) was revealed to hold ([^.]+?)\.")
+USED_UP_ITEM = re.compile(r"(?:^|\. )([^.]+?)'s ([^.]+?) was used up\.")
+ABILITY_ACTIVATED = re.compile(r"(?:^|\. )([^.]+?)'s ([^.]+?) ability activated\.")
+
+def to_id(text):
+    """'Iron Valiant' -> 'ironvaliant', the form poke_env uses for species, moves and items."""
+    return "".join(c for c in text.lower() if c.isalnum())
+
+def _after(lines, heading):
+    """Lines from `heading` on, empty if it is missing."""
+    return lines[lines.index(heading):] if heading in lines else []
+
+def _field(block, name):
+    """Value of the first 'name: value' line in block."""
+    prefix = f"{name}: "
+    return next((line[len(prefix):].strip() for line in block if line.startswith(prefix)), None)
+
+def parse_turn(battle_state):
+    """
+    Read one logged battle state.
+
+    Returns:
+        dict: opponent active species and ability, our species, last turn summary
+    """
+    lines = battle_state.splitlines()
+    opponent = _after(lines, "OPPONENT STATUS")
+    own = _after(lines, "YOUR STATUS")
+    switches = parse_available_actions(battle_state)["switch"]
+    summary = None
+    for i, line in enumerate(lines):
+        if line.startswith("LAST TURN (") and i + 1 < len(lines):
+            summary = lines[i + 1]
+    return {
+        "opponent": _field(opponent, "ACTIVE POKEMON"),
+        "ability": _field(opponent, "Ability"),
+        "own": {species for species in [_field(own, "ACTIVE POKEMON")] + switches if species},
+        "summary": summary or ""
+    }
+
+def battle_features(battle):
+    """
+    What the opponent revealed in one battle.
+
+    Returns:
+        dict: {species: set of (kind, name) features} for every opponent species seen
+    """
+    turns = [parse_turn(turn["battle_state"]) for turn in battle.get("turns", []) if turn.get("battle_state")]
+    revealed = {turn["opponent"]: set() for turn in turns if turn["opponent"]}
+    own = set().union(*(turn["own"] for turn in turns)) if turns else set()
+    # Summaries name Pokemon by display name; only unambiguous opponents count
+    by_id = {to_id(species): species for species in revealed if species not in own}
+
+    for turn in turns:
+        if turn["opponent"] and turn["ability"] and turn["ability"] != "Unknown":
+            revealed[turn["opponent"]].add(("ability", to_id(turn["ability"])))
+        for pattern, kind in ((USED_MOVE, "move"), (REVEALED_ITEM, "item"), (USED_UP_ITEM, "item"), (ABILITY_ACTIVATED, "ability")):
+            for name, feature in pattern.findall(turn["summary"]):
+                species = by_id.get(to_id(name))
+                if species:
+                    revealed[species].add((kind, to_id(feature)))
+    return revealed
+
+def build_index(logs_dir="./logs", start_date=None, end_date=None):
+    """
+    Count, over every logged battle, in how many battles each opponent
+    species appeared and revealed each feature.
+
+    Returns:
+        tuple: (battles per species, feature counts per species), see write_set_index()
+    """
+    battles = Counter()
+    counts = defaultdict(Counter)
+    n_battles = 0
+    # Logs are read one at a time, so memory stays flat however large the corpus
+    for battle in get_battle_logs(logs_dir, start_date, end_date):
+        n_battles += 1
+        for species, features in battle_features(battle).items():
+            battles[species] += 1
+            counts[species].update(features)
+    ic(n_battles, len(battles))
+    return battles, counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opponent set index from battle logs")
+    parser.add_argument("--logs_dir", type=str, default="./logs", help="Directory of battle logs")
+    parser.add_argument("--start", type=str, help="Start date for logs (format: YYYYMMDD_HHMMSS)")
+    parser.add_argument("--end", type=str, help="End date for logs (format: YYYYMMDD_HHMMSS)")
+    parser.add_argument("--output", type=str, default=DEFAULT_INDEX_PATH, help="Index path; .npy and .json files are written")
+    args = parser.parse_args()
+
+    battles, counts = build_index(args.logs_dir, args.start, args.end)
+    write_set_index(battles, counts, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -31,7 +31,7 @@ def get_battle_logs(logs_dir="./logs", start_date=None, end_date=None):
 def main():    
     for battle_log in get_battle_logs(start_date="20241012_000000", end_date="20251012_000000"):
         for turn in battle_log[0]["turns"]:
-            if "BATTLE STATE - TURN 10\n============================\n\nPREVIOUS TURN (8):\nDecidueye was switched in at 100% HP but took 12% damage from Stealth Rock. Houndstone then used Body Press" in turn["battle_state"]:
+            if "BATTLE STATE - TURN 10\n============================\n\nPREVIOUS TURN (8):\nDecidueye was switched in at 100% HP but took 12% damage from Stealth Rock. Houndstone then used Body Press" in (turn["battle_state"] or ""):
                 # print battle log folder name
                 print(battle_log[1].parent.name)
                 break
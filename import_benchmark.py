@@ -0,0 +1,65 @@
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+# Measures how long the entry points take to import, each in a fresh
+# interpreter so nothing is already in sys.modules. Interpreter startup
+# (`python -c pass`) is measured too and subtracted from every result.
+
+DEFAULT_TARGETS = ["main", "stats", "rank_tracking"]
+
+def time_import(statement, runs):
+    """Median wall time in seconds of running `statement` in a fresh interpreter."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def slowest_imports(module, top):
+    """
+    The modules that took longest to import, from `python -X importtime`.
+
+    Returns:
+        list: (cumulative microseconds, module name) pairs, slowest first
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*(.+)", line)
+        if match:
+            imports.append((int(match.group(1)), match.group(2).strip()))
+    return sorted(imports, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the entry point scripts")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS, help="Modules to import")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest imports of each target")
+    parser.add_argument("--budget", type=float, help="Exit with an error if any target takes longer than this many ms")
+    args = parser.parse_args()
+
+    baseline = time_import("pass", args.runs)
+    print(f"{'interpreter':<16} {baseline * 1000:8.1f} ms (subtracted below)")
+
+    over_budget = []
+    for target in args.targets:
+        elapsed = (time_import(f"import {target}", args.runs) - baseline) * 1000
+        print(f"{target:<16} {elapsed:8.1f} ms")
+        if args.budget is not None and elapsed > args.budget:
+            over_budget.append(target)
+        for cumulative, module in slowest_imports(target, args.top) if args.top else []:
+            print(f"    {cumulative / 1000:8.1f} ms  {module}")
+
+    if over_budget:
+        sys.exit(f"Over the {args.budget:g} ms budget: {', '.join(over_budget)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,31 @@
 import asyncio
-from poke_env import AccountConfiguration, ShowdownServerConfiguration
-from poke_env.player import RandomPlayer, SimpleHeuristicsPlayer
-from players import *
 import argparse
 
-async def local(n_battles=1, model=None):
+# poke_env, the players and the LLM client are imported inside the functions
+# that use them, so `python main.py --help` starts instantly.
+
+# Player classes by --player name, resolved from the players package on use
+PLAYERS = {
+    "logging": "LoggingPlayer",
+    "sck": "SCkPlayer",
+    "sc3": "SC3Player",
+    "cascade": "CascadePlayer",
+    "memory": "MemoryPlayer",
+    "opposition": "OppositionPlayer",
+    "strategy": "InitialStrategyPlayer"
+}
+
+def get_player_class(name):
+    """Look up a player class by its --player name."""
+    import players
+    return getattr(players, PLAYERS[name])
+
+async def local(n_battles=1, model=None, summarizer='llm', stream_decisions=False, player_class=None):
+    from poke_env.player import SimpleHeuristicsPlayer
+    player_class = player_class or get_player_class("memory")
 
     # Create Player 1
-    LLMagikarp = MemoryPlayer(model=model)
+    LLMagikarp = player_class(model=model, summarizer=summarizer, stream_decisions=stream_decisions)
 
     # Create Player 2
     HeuristicsPlayer = SimpleHeuristicsPlayer()
@@ -16,6 +34,8 @@ async def local(n_battles=1, model=None):
     await LLMagikarp.battle_against(HeuristicsPlayer, n_battles=n_battles)
 
 async def server(n_challenges=1, model=None):
+    from poke_env import AccountConfiguration, ShowdownServerConfiguration
+    from poke_env.player import SimpleHeuristicsPlayer
 
     # Create Bot
     player = SimpleHeuristicsPlayer(
@@ -25,13 +45,17 @@ async def server(n_challenges=1, model=None):
 
     await player.send_challenges("LLMagikarp", n_challenges=n_challenges)
 
-async def ladder(n_battles=1, model=None):
+async def ladder(n_battles=1, model=None, summarizer='llm', decision_timeout=None, player_class=None):
+    from poke_env import AccountConfiguration, ShowdownServerConfiguration
+    player_class = player_class or get_player_class("sc3")
 
-    LLMagikarp = SC3Player(
+    LLMagikarp = player_class(
         account_configuration=AccountConfiguration("gwherb", "Just4Gh!"),
         server_configuration=ShowdownServerConfiguration,
         start_timer_on_battle_start=True,
-        model=model
+        model=model,
+        summarizer=summarizer,
+        decision_timeout=decision_timeout
     )
 
     await LLMagikarp.ladder(n_battles)
@@ -44,18 +68,40 @@ def main():
     parser.add_argument("--mode", type=str, help="Mode to run the bot in")
     parser.add_argument("--battle_num", type=int, help="Number of battles to run")
     parser.add_argument("--model", type=str, help="Model to use for completion")
+    parser.add_argument("--player", type=str, choices=sorted(PLAYERS), help="Player to run (default: memory for local, sc3 for ladder)")
+    parser.add_argument("--summarizer", type=str, choices=["llm", "rules"], default="llm", help="How the last turn is summarized")
+    parser.add_argument("--decision_timeout", type=float, default=30, help="Seconds per ladder turn before the heuristic fallback decides")
+    parser.add_argument("--stream", action="store_true", help="Send the order as soon as the streamed action is parsed (local mode)")
+    parser.add_argument("--pool_size", type=int, help="Number of pooled LLM connections")
+    parser.add_argument("--rpm", type=int, help="LLM requests per minute allowed for the account")
+    parser.add_argument("--tpm", type=int, help="LLM tokens per minute allowed for the account")
+    parser.add_argument("--base_url", type=str, help="OpenAI-compatible API root, e.g. http://localhost:8000/v1 for mock_llm_server.py")
+    parser.add_argument("--set_index", type=str, help="Opponent set index built by build_set_index.py (default: opponent_sets)")
+    parser.add_argument("--model_alias", type=str, action="append", default=[], help="Serve a requested model with another, e.g. gpt-4o=llama3 (repeatable)")
 
     model = 'gpt-4o-mini'
     args = parser.parse_args()
+    from prompts import configure_client, configure_scheduler, configure_backend, configure_set_index
     if args.model:
         model = args.model
+    if args.pool_size:
+        configure_client(pool_size=args.pool_size)
+    if args.base_url or args.model_alias:
+        aliases = dict(alias.split("=", 1) for alias in args.model_alias)
+        configure_backend(base_url=args.base_url, model_aliases=aliases)
+    if args.set_index:
+        configure_set_index(args.set_index)
+    if args.rpm or args.tpm:
+        configure_scheduler(rpm=args.rpm, tpm=args.tpm)
 
     if args.mode == "local":
-        asyncio.get_event_loop().run_until_complete(local(args.battle_num, model))
+        asyncio.get_event_loop().run_until_complete(local(args.battle_num, model, args.summarizer, args.stream,
+                                                          get_player_class(args.player or "memory")))
     elif args.mode == "server":
         asyncio.get_event_loop().run_until_complete(server(args.battle_num, model))
     elif args.mode == "ladder":
-        asyncio.get_event_loop().run_until_complete(ladder(args.battle_num, model))
+        asyncio.get_event_loop().run_until_complete(ladder(args.battle_num, model, args.summarizer, args.decision_timeout,
+                                                           get_player_class(args.player or "sc3")))
     else:
         print("Invalid mode")
 
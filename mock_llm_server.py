@@ -0,0 +1,222 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from prompts.utils import parse_available_actions
+
+# Minimal OpenAI-compatible chat completions server for network-free runs.
+# select_move function calls are answered with a legal action chosen by the
+# configured policy; every other request gets a short canned text reply.
+#
+#   python mock_llm_server.py --policy random --port 8000
+#   python main.py --mode local --battle_num 10 --base_url http://localhost:8000/v1
+
+class MockPolicy:
+    def __init__(self, policy="random", script=None, seed=None):
+        self.policy = policy
+        self.random = random.Random(seed)
+        self.script = None
+        self.lock = threading.Lock()
+        if policy == "scripted":
+            with open(script, "r") as f:
+                actions = [json.loads(line) for line in f if line.strip()]
+            self.script = itertools.cycle(actions)
+
+    def choose(self, legal):
+        """
+        Pick an action from the legal moves and switches.
+
+        Args:
+            legal (dict): {"move": [...], "switch": [...]}
+
+        Returns:
+            tuple: (action_type, action_name)
+        """
+        options = [("move", name) for name in legal["move"]] + [("switch", name) for name in legal["switch"]]
+        with self.lock:
+            if self.policy == "scripted":
+                action = next(self.script)
+                return action["action_type"], action["action_name"]
+            if not options:
+                return "move", "struggle"
+            if self.policy == "first":
+                return options[0]
+            return self.random.choice(options)
+
+def _current_state(user_text):
+    """The battle state being asked about, without the few-shot examples before it."""
+    start = user_text.rfind("BATTLE STATE - TURN")
+    if start < 0:
+        # No header, start at the last listing of legal actions instead
+        start = user_text.rfind("AVAILABLE MOVES:")
+        if start < 0:
+            start = user_text.rfind("AVAILABLE SWITCHES:")
+    return user_text[max(start, 0):]
+
+def _legal_actions(request):
+    """Read legal actions from the battle state text, narrowed to the schema enum if present."""
+    user_text = "\n".join(message.get("content") or "" for message in request.get("messages", []) if message.get("role") == "user")
+    legal = parse_available_actions(_current_state(user_text))
+    for function in request.get("functions", []):
+        names = function.get("parameters", {}).get("properties", {}).get("action_name", {}).get("enum")
+        if names:
+            narrowed = {kind: [name for name in legal[kind] if name in names] for kind in legal}
+            if narrowed["move"] or narrowed["switch"]:
+                return narrowed
+            # State text not recognised, treat every enum entry as a move
+            return {"move": list(names), "switch": []}
+    return legal
+
+def _usage(request, completion_text):
+    prompt_tokens = sum(len(message.get("content") or "") for message in request.get("messages", [])) // 4
+    completion_tokens = max(1, len(completion_text) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0}
+    }
+
+def build_completion(request, policy, counter):
+    """Build a chat.completion response body for a request."""
+    message = {"role": "assistant", "content": None}
+    if request.get("functions"):
+        function = request["functions"][0]
+        action_type, action_name = policy.choose(_legal_actions(request))
+        values = {
+            "Thought": f"Mock {policy.policy} policy chose {action_name}.",
+            "action_type": action_type,
+            "action_name": action_name
+        }
+        # Emit fields in schema order, like the real models do
+        order = list(function.get("parameters", {}).get("properties", {})) or list(values)
+        arguments = json.dumps({name: values[name] for name in order if name in values})
+        message["function_call"] = {"name": function["name"], "arguments": arguments}
+        completion_text = arguments
+    else:
+        message["content"] = "Mock response: nothing of note happened."
+        completion_text = message["content"]
+
+    return {
+        "id": f"chatcmpl-mock-{counter}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{"index": 0, "message": message, "finish_reason": "stop", "logprobs": None}],
+        "usage": _usage(request, completion_text)
+    }
+
+def stream_chunks(completion, include_usage=False, chunk_size=8):
+    """Split a completion into chat.completion.chunk bodies, as sent over SSE."""
+    message = completion["choices"][0]["message"]
+    base = {key: completion[key] for key in ("id", "created", "model")}
+    base["object"] = "chat.completion.chunk"
+
+    def chunk(delta, finish_reason=None):
+        return dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}], usage=None)
+
+    yield chunk({"role": "assistant", "content": None})
+    if message.get("function_call"):
+        arguments = message["function_call"]["arguments"]
+        yield chunk({"function_call": {"name": message["function_call"]["name"], "arguments": ""}})
+        for i in range(0, len(arguments), chunk_size):
+            yield chunk({"function_call": {"arguments": arguments[i:i + chunk_size]}})
+    else:
+        content = message["content"]
+        for i in range(0, len(content), chunk_size):
+            yield chunk({"content": content[i:i + chunk_size]})
+    yield chunk({}, "stop")
+    if include_usage:
+        yield dict(base, choices=[], usage=completion["usage"])
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    policy = None
+    latency = 0
+    token_latency = 0
+    counter = itertools.count()
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, chunks):
+        # Server-sent events over chunked transfer encoding so keep-alive works
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for body in itertools.chain((json.dumps(chunk) for chunk in chunks), ["[DONE]"]):
+            event = f"data: {body}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(event):X}\r\n".encode("ascii") + event + b"\r\n")
+            self.wfile.flush()
+            if self.token_latency:
+                time.sleep(self.token_latency)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON"}})
+            return
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+        completion = build_completion(request, self.policy, next(self.counter))
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage", False)
+            self._send_stream(stream_chunks(completion, include_usage))
+        else:
+            self._send_json(200, completion)
+
+    def log_message(self, format, *args):
+        # Keep load tests quiet
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--policy", type=str, choices=["random", "first", "scripted"], default="random", help="How select_move actions are chosen")
+    parser.add_argument("--script", type=str, help="JSONL file of {action_type, action_name} for the scripted policy, replayed in a loop")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds to wait before each response")
+    parser.add_argument("--token_latency", type=float, default=0, help="Seconds between streamed chunks")
+    parser.add_argument("--seed", type=int, help="Random seed for the random policy")
+    args = parser.parse_args()
+
+    if args.policy == "scripted" and not args.script:
+        parser.error("--script is required for the scripted policy")
+
+    MockLLMHandler.policy = MockPolicy(args.policy, args.script, args.seed)
+    MockLLMHandler.latency = args.latency
+    MockLLMHandler.token_latency = args.token_latency
+    server = ThreadingHTTPServer((args.host, args.port), MockLLMHandler)
+    print(f"Mock LLM server ({args.policy} policy) listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
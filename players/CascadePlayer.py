@@ -0,0 +1,55 @@
+import asyncio
+import json
+import openai
+from icecream import ic
+from prompts import *
+from players import SCkPlayer
+
+# Failures of the cheap tier that the escalation model can answer instead:
+# API errors, timeouts and unparseable select_move arguments
+ESCALATION_ERRORS = (openai.OpenAIError, asyncio.TimeoutError, json.JSONDecodeError, KeyError)
+
+class CascadePlayer(SCkPlayer):
+    def __init__(self, *args, escalation_model='gpt-4o', **kwargs):
+        """
+        Model cascade: the cheap model (`model`) votes first, and the stronger
+        escalation model is only asked when its samples disagree, are illegal
+        or fail.
+
+        Args:
+            escalation_model (str): Model that decides contested turns
+        """
+        kwargs.setdefault("model", "gpt-4o-mini")
+        kwargs.setdefault("k", 2)
+        kwargs.setdefault("wave_size", 2)
+        kwargs.setdefault("stop_margin", 2)
+        super().__init__(*args, **kwargs)
+        self.escalation_model = escalation_model
+        self.name = "CascadePlayer"
+
+    def _confident(self, counts):
+        """The cheap samples agree on a legal action by at least stop_margin votes."""
+        ranked = counts.most_common(2) + [(None, 0), (None, 0)]
+        return ranked[0][1] - ranked[1][1] >= (self.stop_margin or self.k)
+
+    async def _decide(self, battle, battle_state):
+        actions, counts, completed = [], None, 0
+        try:
+            actions, counts, completed = await self._sample_votes(battle, battle_state, self.LLM_model)
+            if self._confident(counts):
+                thought, action_type, action_name, log_kwargs = self._tally(actions, counts, completed)
+                log_kwargs["decision_tier"] = "base"
+                return thought, action_type, action_name, log_kwargs
+        except ESCALATION_ERRORS as e:
+            ic(f"Turn {battle.turn}: {self.LLM_model} samples failed ({e}), escalating")
+
+        thought, action_type, action_name = await move_prompt_async(
+            battle_state, self.escalation_model, mode=self.move_prompt_mode, legal_actions=self._legal_actions(battle)
+        )
+        return thought, action_type, action_name, {
+            "consensus": False,
+            "voting": [action[2] for action in actions],
+            "samples_used": completed + 1,
+            "vote_distribution": dict(counts or {}),
+            "decision_tier": "escalated"
+        }
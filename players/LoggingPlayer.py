@@ -3,22 +3,55 @@ from poke_env import Player
 from icecream import ic
 from prompts import *
 from battle_logger import BattleLogger
+from players.heuristics import choose_heuristic_action, fast_path_action
 from time import perf_counter
 
 class LoggingPlayer(Player):
-    def __init__(self, model='gpt-4o-mini', *args, **kwargs):
+    # Move prompt template, see prompts/move_prompt.py MOVE_PROMPTS
+    move_prompt_mode = None
+    # Re-asks allowed per turn when the chosen action cannot be resolved
+    max_reasks = 1
+
+    def __init__(self, model='gpt-4o-mini', *args, summarizer='llm', decision_timeout=None, stream_decisions=False,
+                 constrain_actions=False, fast_path=True, **kwargs):
+        """
+        Args:
+            model (str): LLM model used for decisions
+            summarizer (str): 'llm' to summarize the last turn with the model,
+                'rules' to use the deterministic event renderer instead
+            decision_timeout (float): Seconds the LLM gets per turn before a
+                local heuristic decides instead. None disables the deadline.
+            stream_decisions (bool): Stream the move call with the action-first
+                schema and send the order as soon as the action is parsed. The
+                Thought is added to the turn log when the stream finishes.
+            constrain_actions (bool): Restrict action_name to this turn's legal
+                actions with a schema enum. Off by default: it costs provider
+                prompt caching of the static prompt prefix, since the schema
+                changes every turn.
+            fast_path (bool): Answer forced turns and guaranteed KOs locally
+                without calling the LLM
+        """
         super().__init__(*args, **kwargs)
         self._battle_logger = BattleLogger()
         self._game_started = False
         self._current_battle = None
+        # Per-battle history, thoughts and strategy, see prompts/battle_context.py
+        self._battle_contexts = BattleContextStore()
+        # Memory-map the opponent set index now rather than on the first turn
+        get_set_index()
         self.LLM_model = model
+        self.summarizer = summarizer
+        self.decision_timeout = decision_timeout
+        self.stream_decisions = stream_decisions
+        self.constrain_actions = constrain_actions
+        self.fast_path = fast_path
         self.name = "LoggingPlayer"
 
     async def battle_against(self, opponent, n_battles=1):
         """Override battle_against to add logging for local battles."""
         # Store the original n_battles
         total_battles = n_battles
-        
+
         # Run each battle separately to ensure proper logging
         for battle_number in range(total_battles):
             # Reset game state for new battle
@@ -53,12 +86,23 @@ class LoggingPlayer(Player):
             self._current_battle = None
             self._battles.clear()  # Clear battles dictionary after logging
 
+        ic(get_usage_stats())
+
+    async def _battle_against(self, opponent, n_battles):
+        """Runs on poke_env's POKE_LOOP, the loop choose_move and its LLM calls run on."""
+        # Open the LLM connection pool before the first turn, on the loop that will use it
+        await warm_up_async_client()
+        await super()._battle_against(opponent, n_battles)
+
     async def _ladder(self, n_games: int):
         """Override _ladder to add logging for ladder battles."""
         await self.ps_client.logged_in.wait()
         start_time = perf_counter()
         completed_games = 0
 
+        # Open the LLM connection pool before the first turn
+        await warm_up_async_client()
+
         while completed_games < n_games:
             # Reset game state for new battle
             self._game_started = False
@@ -99,13 +143,162 @@ class LoggingPlayer(Player):
         await self._battle_count_queue.join()
 
         ic(f"Laddering ({n_games} battles) finished in {perf_counter() - start_time}s")
+        ic(get_usage_stats())
+
+    async def choose_move(self, battle):
+        """
+        Override choose_move to add logging for each turn. The LLM calls are
+        awaited so other battles on the event loop keep running meanwhile.
+        If the LLM misses the turn deadline or fails, a local heuristic decides.
+        """
+        start_time = perf_counter()
+        if self.fast_path:
+            # An unusual state must not cost the turn its order, the LLM decides instead
+            try:
+                fast_action = fast_path_action(battle, get_turn_damage(battle, self._battle_context(battle)))
+                if fast_action is not None:
+                    return self._execute_fast_path(battle, *fast_action, decision_time=round(perf_counter() - start_time, 6))
+            except Exception as e:
+                ic(f"Turn {battle.turn}: fast path failed ({e}), asking the LLM")
+
+        llm_calls = start_turn_telemetry()
+        state = {"battle_state": None}
+
+        async def llm_decision():
+            # Get battle state and decision
+            state["battle_state"] = await self._build_battle_state(battle)
+            # ic(battle_state) # Debugging
+            decision = await self._decide(battle, state["battle_state"])
+            return await self._resolve_decision(battle, state["battle_state"], *decision)
+
+        try:
+            thought, action_type, action_name, log_kwargs = await asyncio.wait_for(llm_decision(), self.decision_timeout)
+        except asyncio.TimeoutError:
+            ic(f"Turn {battle.turn}: LLM missed the {self.decision_timeout}s deadline, using heuristic")
+            return self._execute_fallback(battle, state["battle_state"], None, "fallback_timeout",
+                                          llm_calls=llm_calls, decision_time=round(perf_counter() - start_time, 4))
+        except Exception as e:
+            ic(f"Turn {battle.turn}: LLM decision failed ({e}), using heuristic")
+            return self._execute_fallback(battle, state["battle_state"], None, "fallback_error",
+                                          llm_calls=llm_calls, decision_time=round(perf_counter() - start_time, 4))
+
+        thought_task = log_kwargs.pop("thought_task", None)
+        log_kwargs["llm_calls"] = llm_calls
+        log_kwargs["decision_time"] = round(perf_counter() - start_time, 4)
+        order = self._execute_action(battle, state["battle_state"], thought, action_type, action_name, **log_kwargs)
+        if thought_task is not None:
+            self._log_thought_when_done(battle.turn, thought_task, llm_calls)
+        return order
+
+    def _battle_context(self, battle):
+        """The BattleContext holding this battle's memory between turns."""
+        return self._battle_contexts.get(battle)
+
+    def _battle_finished_callback(self, battle):
+        self._battle_contexts.evict(battle.battle_tag)
+        super()._battle_finished_callback(battle)
+
+    async def _build_battle_state(self, battle):
+        """Build the battle state text passed to the LLM."""
+        return await format_battle_prompt_async(battle, self.LLM_model, summarizer=self.summarizer,
+                                                context=self._battle_context(battle))
+
+    async def _decide(self, battle, battle_state):
+        """
+        Ask the LLM for an action.
+
+        Returns:
+            tuple: (thought, action_type, action_name, extra log_turn kwargs)
+        """
+        if self.stream_decisions:
+            return await self._decide_streaming(battle, battle_state)
+        thought, action_type, action_name = await move_prompt_async(
+            battle_state, self.LLM_model, mode=self.move_prompt_mode, legal_actions=self._legal_actions(battle)
+        )
+        return thought, action_type, action_name, {}
+
+    async def _decide_streaming(self, battle, battle_state):
+        """
+        Streamed version of _decide(). Returns once the action is parsed; the
+        Thought arrives later through the 'thought_task' log kwarg.
+        """
+        action_type, action_name, thought_task = await move_prompt_stream_async(
+            battle_state, self.LLM_model, mode=self.move_prompt_mode, legal_actions=self._legal_actions(battle)
+        )
+        return None, action_type, action_name, {"thought_task": thought_task}
+
+    def _legal_actions(self, battle):
+        """Legal actions for the schema enum, or None when unconstrained."""
+        return legal_actions(battle) if self.constrain_actions else None
+
+    async def _resolve_decision(self, battle, battle_state, thought, action_type, action_name, log_kwargs):
+        """
+        Map the chosen action onto a legal one, tolerating case, hyphens and
+        missing forms. On a miss the model is asked again, at most max_reasks times.
+
+        Returns:
+            tuple: (thought, action_type, action_name, extra log_turn kwargs)
+        """
+        actions = legal_actions(battle)
+        index = ActionIndex(actions)
+        resolved = index.resolve(action_type, action_name)
+        reasks = 0
+        while resolved is None and reasks < self.max_reasks and (actions["move"] or actions["switch"]):
+            reasks += 1
+            ic(f"Turn {battle.turn}: '{action_name}' is not a legal {action_type}, asking again")
+            thought_task = log_kwargs.pop("thought_task", None)
+            if thought_task is not None:
+                thought_task.cancel()
+            reask_state = (
+                f"{battle_state}\n\nYour previous choice '{action_name}' is not available this turn. "
+                f"Choose exactly one of the following.\n{format_legal_actions(actions)}"
+            )
+            thought, action_type, action_name = await move_prompt_async(
+                reask_state, self.LLM_model, mode=self.move_prompt_mode, legal_actions=actions
+            )
+            resolved = index.resolve(action_type, action_name)
+
+        if resolved is not None:
+            action_type, action_name = resolved
+        log_kwargs["reasks"] = reasks
+        return thought, action_type, action_name, log_kwargs
+
+    def _log_thought_when_done(self, turn_number, thought_task, llm_calls):
+        """
+        Fill in the turn's Thought once the stream finishes, and re-log its
+        llm_calls: the streamed call is only recorded when its stream ends,
+        after the turn was first written.
+        """
+        battle_logger = self._battle_logger
+
+        def on_done(task):
+            if task.cancelled():
+                return
+            fields = {"llm_calls": list(llm_calls)}
+            if task.result() is not None:
+                fields["thought"] = task.result()
+            battle_logger.update_turn(turn_number, **fields)
+
+        thought_task.add_done_callback(on_done)
 
-    def choose_move(self, battle):
-        """Override choose_move to add logging for each turn."""
-        # Get battle state and decision
-        battle_state = format_battle_prompt(battle, self.LLM_model)
-        # ic(battle_state) # Debugging
-        thought, action_type, action_name = move_prompt(battle_state, self.LLM_model)
+    def _find_action(self, battle, action_type, action_name):
+        """Return the available Move or Pokemon matching the action, or None."""
+        if action_type == "move":
+            for move in battle.available_moves:
+                if move.id == action_name:
+                    return move
+        elif action_type == "switch":
+            for switch in battle.available_switches:
+                if switch.species == action_name:
+                    return switch
+        return None
+
+    def _execute_action(self, battle, battle_state, thought, action_type, action_name, **log_kwargs):
+        """Log the turn and turn the chosen action into an order."""
+        action = self._find_action(battle, action_type, action_name)
+        if action is None:
+            # Unusable output, let the heuristic decide
+            return self._execute_fallback(battle, battle_state, thought, "fallback_invalid", **log_kwargs)
 
         # Log the turn
         if self._game_started:  # Only log if game is properly started
@@ -115,19 +308,55 @@ class LoggingPlayer(Player):
                 thought=thought,
                 action_type=action_type,
                 action_name=action_name,
-                is_random=False
+                is_random=False,
+                **log_kwargs
             )
-        
-        # Execute move logic
-        if action_type == "move":
-            for move in battle.available_moves:
-                if move.id == action_name:
-                    return self.create_order(move)
-        elif action_type == "switch":
-            for switch in battle.available_switches:
-                if switch.species == action_name:
-                    return self.create_order(switch)
-        
+
+        return self.create_order(action)
+
+    def _execute_fast_path(self, battle, action, reason, decision_time):
+        """Log and play an action chosen by the fast path, no battle state or LLM call needed."""
+        # Keep the turn history the next battle state shows as PREVIOUS TURN,
+        # summarized by the rule-based renderer so no LLM call is made
+        if battle.observations:
+            current_turn = max(battle.observations.keys())
+            summary = render_turn_events(battle.observations[current_turn].events, battle.player_role)
+            self._battle_context(battle).record_turn(current_turn, summary)
+
+        action_type = "move" if action in battle.available_moves else "switch"
+        if self._game_started:
+            self._battle_logger.log_turn(
+                turn_number=battle.turn,
+                battle_state=None,
+                thought=f"Fast path: {reason}",
+                action_type=action_type,
+                action_name=action.id if action_type == "move" else action.species,
+                is_random=False,
+                llm_calls=[],
+                decision_time=decision_time,
+                decision_source="fast_path"
+            )
+        return self.create_order(action)
+
+    def _execute_fallback(self, battle, battle_state, thought, decision_source, **log_kwargs):
+        """Decide with the local heuristic, or a random move if it has nothing to offer."""
+        action = choose_heuristic_action(battle)
+        if action is not None:
+            action_type = "move" if action in battle.available_moves else "switch"
+            action_name = action.id if action_type == "move" else action.species
+            if self._game_started:
+                self._battle_logger.log_turn(
+                    turn_number=battle.turn,
+                    battle_state=battle_state,
+                    thought=thought,
+                    action_type=action_type,
+                    action_name=action_name,
+                    is_random=False,
+                    decision_source=decision_source,
+                    **log_kwargs
+                )
+            return self.create_order(action)
+
         # If we get here, we need to make a random move
         random_move = self.choose_random_move(battle)
         
@@ -137,9 +366,11 @@ class LoggingPlayer(Player):
                 turn_number=battle.turn,
                 battle_state=battle_state,
                 thought=thought,
-                action_type=action_type,
-                action_name=action_name,
-                is_random=True
+                action_type=None,
+                action_name=None,
+                is_random=True,
+                decision_source="random",
+                **log_kwargs
             )
         
-        return random_move
\ No newline at end of file
+        return random_move
@@ -3,51 +3,27 @@ from prompts import *
 from players import LoggingPlayer
 
 class MemoryPlayer(LoggingPlayer):
+    move_prompt_mode = "memory"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.last_thought = None
         self.name = "MemoryPlayer"
 
-    def choose_move(self, battle):
-            # Get battle state and decision
-            battle_state = memory_battle_state(battle, self.LLM_model, thought=self.last_thought)
-            # ic(battle_state) # Debugging
-            thought, action_type, action_name = move_prompt(battle_state, self.LLM_model, mode="memory")
-            self.last_thought = thought
+    async def _build_battle_state(self, battle):
+        context = self._battle_context(battle)
+        return await memory_battle_state_async(battle, self.LLM_model, thought=context.last_thought,
+                                               summarizer=self.summarizer, context=context)
 
-            # Log the turn
-            if self._game_started:  # Only log if game is properly started
-                self._battle_logger.log_turn(
-                    turn_number=battle.turn,
-                    battle_state=battle_state,
-                    thought=thought,
-                    action_type=action_type,
-                    action_name=action_name,
-                    is_random=False
-                )
-            
-            # Execute move logic
-            if action_type == "move":
-                for move in battle.available_moves:
-                    if move.id == action_name:
-                        return self.create_order(move)
-            elif action_type == "switch":
-                for switch in battle.available_switches:
-                    if switch.species == action_name:
-                        return self.create_order(switch)
-            
-            # If we get here, we need to make a random move
-            random_move = self.choose_random_move(battle)
-            
-            # Log the random move
-            if self._game_started:
-                self._battle_logger.log_turn(
-                    turn_number=battle.turn,
-                    battle_state=battle_state,
-                    thought=thought,
-                    action_type=action_type,
-                    action_name=action_name,
-                    is_random=True
-                )
-            
-            return random_move
\ No newline at end of file
+    async def _decide(self, battle, battle_state):
+        context = self._battle_context(battle)
+        decision = await super()._decide(battle, battle_state)
+        thought_task = decision[3].get("thought_task")
+        if thought_task is None:
+            context.last_thought = decision[0]
+        else:
+            # Remember the Thought for the next turn once it finishes streaming
+            context.last_thought = None
+            thought_task.add_done_callback(
+                lambda task: setattr(context, "last_thought", None if task.cancelled() else task.result())
+            )
+        return decision
@@ -0,0 +1,107 @@
+import asyncio
+from collections import Counter
+from prompts import *
+from players import LoggingPlayer
+from statistics import multimode
+
+class SCkPlayer(LoggingPlayer):
+    def __init__(self, *args, k=5, wave_size=2, stop_margin=2, **kwargs):
+        """
+        Self-consistency with an adaptive sampling budget: samples are drawn in
+        waves and sampling stops once the vote is decided, so only contested
+        turns spend the full budget.
+
+        Args:
+            k (int): Maximum number of samples per turn
+            wave_size (int): Samples requested concurrently per wave
+            stop_margin (int): Stop once the leading action is this many votes
+                ahead. None only stops when the remaining samples can no longer
+                change the outcome.
+        """
+        super().__init__(*args, **kwargs)
+        self.name = "SCkPlayer"
+        self.k = k
+        self.wave_size = wave_size
+        self.stop_margin = stop_margin
+
+    def _decided(self, counts, completed):
+        """Whether the remaining samples can't (or are not worth trying to) change the vote."""
+        ranked = counts.most_common(2) + [(None, 0), (None, 0)]
+        if ranked[0][1] == 0:
+            return False
+        lead = ranked[0][1] - ranked[1][1]
+        if self.stop_margin is not None and lead >= self.stop_margin:
+            return True
+        return lead > self.k - completed
+
+    async def _decide(self, battle, battle_state):
+        actions, counts, completed = await self._sample_votes(battle, battle_state, self.LLM_model)
+        return self._tally(actions, counts, completed)
+
+    async def _sample_votes(self, battle, battle_state, model):
+        """
+        Draw samples from `model` until the vote is decided or k is reached.
+
+        Returns:
+            tuple: (sampled actions, Counter of legal action votes, samples completed)
+        """
+        # Normalize each sample onto a legal action so 'Knock Off' and
+        # 'knockoff' vote together and illegal samples never win
+        index = ActionIndex(legal_actions(battle))
+        schema_actions = self._legal_actions(battle)
+
+        actions = []
+        counts = Counter()
+        errors = []
+        completed = 0
+        decided = False
+        while completed < self.k and not decided:
+            # The response cache is bypassed so each vote is an independent sample
+            tasks = [
+                asyncio.create_task(move_prompt_async(
+                    battle_state, model, mode=self.move_prompt_mode, use_cache=False,
+                    legal_actions=schema_actions
+                ))
+                for i in range(min(self.wave_size, self.k - completed))
+            ]
+            try:
+                for next_action in asyncio.as_completed(tasks):
+                    try:
+                        action = await next_action
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    finally:
+                        completed += 1
+                    resolved = index.resolve(action[1], action[2])
+                    if resolved is not None:
+                        action = (action[0], *resolved)
+                        counts[action[2]] += 1
+                    actions.append(action)
+                    if self._decided(counts, completed):
+                        decided = True
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        if not actions:
+            raise errors[0]
+        return actions, counts, completed
+
+    def _tally(self, actions, counts, completed):
+        """Pick the winning action and build its log kwargs."""
+        # Get the most common legal action_name (index 2)
+        action_names = list(counts.elements()) or [action[2] for action in actions]
+        voting = multimode(action_names)
+        most_common_name = voting[0]
+        consensus = bool(counts) and counts.most_common(1)[0][1] >= 2
+        # Find the first full action tuple that matches the most common name
+        most_common_action = next(action for action in actions if action[2] == most_common_name)
+
+        return (
+            most_common_action[0],
+            most_common_action[1],
+            most_common_action[2],
+            {"consensus": consensus, "voting": voting, "samples_used": completed, "vote_distribution": dict(counts)}
+        )
@@ -1,17 +1,20 @@
-from .TestPlayer import TestPlayer
-from .LoggingPlayer import LoggingPlayer
-from .SC3Player import SC3Player
-from .MemoryPlayer import MemoryPlayer
-from .OppositionPlayer import OppositionPlayer
-from .InitialStrategyPlayer import InitialStrategyPlayer
+from importlib import import_module
 
-# Import other player classes here
-# from .AnotherPlayer import AnotherPlayer
-# from .YetAnotherPlayer import YetAnotherPlayer
+# Player classes are imported on first use (PEP 562), so `import players`
+# doesn't load poke_env, openai and every player up front. Each class lives
+# in the module of the same name.
 
-# You can also import everything from a module like this:
-# from .TestPlayer import *
+# Add other player names to this list as needed
+__all__ = ['TestPlayer', 'LoggingPlayer', 'SCkPlayer', 'SC3Player', 'CascadePlayer', 'MemoryPlayer', 'OppositionPlayer', 'InitialStrategyPlayer']
 
-# If you want to control what gets imported when someone does `from players import *`,
-# you can define __all__:
-__all__ = ['TestPlayer', 'LoggingPlayer', 'SC3Player', 'MemoryPlayer', 'OppositionPlayer', 'InitialStrategyPlayer']  # Add other player names to this list as needed
+def __getattr__(name):
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Importing the submodule binds it to the package under the class's
+    # name; replace it with the class itself
+    player_class = getattr(import_module(f".{name}", __name__), name)
+    globals()[name] = player_class
+    return player_class
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,167 @@
+from poke_env.environment.effect import Effect
+from poke_env.environment.field import Field
+from poke_env.environment.move_category import MoveCategory
+from poke_env.environment.status import Status
+from prompts.utils import estimate_stats
+from prompts.damage_calc import turn_damage
+
+# Fast local decision rule used when the LLM runs out of time or returns an
+# unusable action. Modelled on poke_env's SimpleHeuristicsPlayer: stay in and
+# use the strongest move unless the matchup is clearly bad, then switch to
+# the bench Pokemon with the best matchup.
+
+SWITCH_OUT_MATCHUP_THRESHOLD = -2
+SPEED_TIER_COEFFICIENT = 0.1
+HP_FRACTION_COEFFICIENT = 0.4
+# Speed multipliers of paralysis and a Choice Scarf
+PARALYSIS_SPEED = 0.5
+CHOICE_SCARF_SPEED = 1.5
+
+# Abilities that can survive or absorb an otherwise certain KO. With any of
+# them possible the KO is not guaranteed and the LLM decides instead.
+KO_BLOCKING_ABILITIES = {
+    "sturdy", "multiscale", "shadowshield", "disguise", "iceface", "wonderguard",
+    "fluffy", "furcoat", "icescales", "filter", "solidrock", "prismarmor",
+    "tabletsofruin", "swordofruin", "beadsofruin", "vesselofruin"
+}
+# Abilities that only absorb or weaken moves of one type
+TYPE_BLOCKING_ABILITIES = {
+    "FIRE": {"flashfire", "wellbakedbody", "thickfat", "heatproof"},
+    "ICE": {"thickfat"},
+    "WATER": {"waterabsorb", "stormdrain", "dryskin"},
+    "ELECTRIC": {"voltabsorb", "lightningrod", "motordrive"},
+    "GRASS": {"sapsipper"},
+    "GROUND": {"levitate", "eartheater"},
+    "GHOST": {"purifyingsalt"}
+}
+
+def _boost_multiplier(boost):
+    return (2 + boost) / 2 if boost >= 0 else 2 / (2 - boost)
+
+def _types(pokemon):
+    return [t for t in pokemon.types if t is not None]
+
+def estimate_matchup(pokemon, opponent):
+    """Positive when `pokemon` is favoured against `opponent`."""
+    score = max([opponent.damage_multiplier(t) for t in _types(pokemon)], default=1)
+    score -= max([pokemon.damage_multiplier(t) for t in _types(opponent)], default=1)
+
+    if pokemon.base_stats["spe"] > opponent.base_stats["spe"]:
+        score += SPEED_TIER_COEFFICIENT
+    elif opponent.base_stats["spe"] > pokemon.base_stats["spe"]:
+        score -= SPEED_TIER_COEFFICIENT
+
+    score += pokemon.current_hp_fraction * HP_FRACTION_COEFFICIENT
+    score -= opponent.current_hp_fraction * HP_FRACTION_COEFFICIENT
+    return score
+
+def score_move(move, attacker, defender):
+    """Expected relative damage of `move` from attacker to defender."""
+    if move.category == MoveCategory.STATUS or not move.base_power:
+        return 0
+
+    estimated = estimate_stats(defender) or {}
+    if move.category == MoveCategory.PHYSICAL:
+        attack = (attacker.stats.get("atk") or attacker.base_stats["atk"]) * _boost_multiplier(attacker.boosts["atk"])
+        defense = estimated.get("defense", defender.base_stats["def"]) * _boost_multiplier(defender.boosts["def"])
+    else:
+        attack = (attacker.stats.get("spa") or attacker.base_stats["spa"]) * _boost_multiplier(attacker.boosts["spa"])
+        defense = estimated.get("special-defense", defender.base_stats["spd"]) * _boost_multiplier(defender.boosts["spd"])
+
+    stab = 1.5 if move.type in attacker.types else 1
+    accuracy = move.accuracy if isinstance(move.accuracy, float) else 1
+    return (
+        move.base_power
+        * stab
+        * defender.damage_multiplier(move)
+        * accuracy
+        * move.expected_hits
+        * attack / max(defense, 1)
+    )
+
+def choose_heuristic_action(battle):
+    """
+    Pick an action without calling the LLM.
+
+    Returns:
+        Move | Pokemon | None: The move or switch to play, None if nothing is available
+    """
+    active = battle.active_pokemon
+    opponent = battle.opponent_active_pokemon
+
+    best_switch = None
+    if battle.available_switches:
+        if opponent is not None:
+            best_switch = max(battle.available_switches, key=lambda mon: estimate_matchup(mon, opponent))
+        else:
+            best_switch = max(battle.available_switches, key=lambda mon: mon.current_hp_fraction)
+
+    if not battle.available_moves:
+        return best_switch
+
+    if opponent is None or active is None:
+        return battle.available_moves[0]
+
+    if best_switch is not None and not battle.trapped:
+        if estimate_matchup(active, opponent) < SWITCH_OUT_MATCHUP_THRESHOLD:
+            return best_switch
+
+    return max(battle.available_moves, key=lambda move: score_move(move, active, opponent))
+
+def _guaranteed_ko(result, attacker, defender):
+    """
+    Whether a move KOs `defender` on the lowest roll against its bulkiest
+    possible spread, before it can act.
+    """
+    move = result["move"]
+    if move.accuracy < 1 or not result["guaranteed_ko"] or Effect.SUBSTITUTE in defender.effects:
+        return False
+    abilities = {defender.ability} if defender.ability else set(defender.possible_abilities or [])
+    blocking = KO_BLOCKING_ABILITIES | TYPE_BLOCKING_ABILITIES.get(move.type.name, set())
+    if defender.current_hp_fraction >= 1 or blocking & abilities:
+        return False
+
+    estimated = estimate_stats(defender)
+    if not estimated or not attacker.stats.get("spe"):
+        return False
+
+    # A revealed priority move can hit first whatever the speeds
+    if any(known.priority > 0 for known in defender.moves.values()):
+        return False
+
+    # Move first: positive priority, or faster than the fastest possible
+    # spread, holding a Choice Scarf unless another item has been seen
+    speed = attacker.stats["spe"] * _boost_multiplier(attacker.boosts["spe"])
+    if attacker.status == Status.PAR:
+        speed *= PARALYSIS_SPEED
+    opponent_speed = estimated["speed_high"] * _boost_multiplier(defender.boosts["spe"])
+    if defender.item in (None, "unknown_item", "choicescarf"):
+        opponent_speed *= CHOICE_SCARF_SPEED
+    return move.priority > 0 or speed > opponent_speed
+
+def fast_path_action(battle, damage=None):
+    """
+    Answer turns that need no deliberation: a single legal action, or a
+    damaging move that KOs the opponent before it can act.
+
+    Args:
+        battle: poke_env battle
+        damage (dict): This turn's turn_damage() results, computed if not given
+
+    Returns:
+        tuple | None: (Move or Pokemon, reason) or None if the LLM should decide
+    """
+    options = battle.available_moves + battle.available_switches
+    if len(options) == 1:
+        return options[0], "only legal action"
+
+    active = battle.active_pokemon
+    opponent = battle.opponent_active_pokemon
+    if active is None or opponent is None or not battle.available_moves or Field.TRICK_ROOM in battle.fields:
+        return None
+
+    damage = damage or turn_damage(battle)
+    for result in damage["moves"]:
+        if _guaranteed_ko(result, active, opponent):
+            return result["move"], f"{result['label']} KOs {opponent.species} before it can move"
+    return None
@@ -1,8 +1,52 @@
-from .battle_state_gen import format_battle_prompt
-from .move_prompt import move_prompt
-from .memory_battle_state import memory_battle_state
-from .opposition_state_gen import opposition_state_gen
-from .initial_strategy import get_strategy
-from .utils import *
-
-__all__ = ['format_battle_prompt', 'move_prompt', 'memory_battle_state', 'opposition_state_gen', 'get_strategy', 'utils']
+from importlib import import_module
+
+# Submodules are imported on first attribute access (PEP 562), so importing
+# the package is cheap and scripts only pay for openai, NumPy and friends
+# when they actually use something that needs them.
+_EXPORTS = {
+    "battle_state_gen": ['format_battle_prompt', 'format_battle_prompt_async'],
+    "move_prompt": ['move_prompt', 'move_prompt_async', 'move_prompt_stream_async', 'build_move_request', 'parse_move_response'],
+    "memory_battle_state": ['memory_battle_state', 'memory_battle_state_async'],
+    "opposition_state_gen": ['opposition_state_gen', 'opposition_state_gen_async'],
+    "initial_strategy": ['get_strategy', 'get_strategy_async'],
+    "utils": ['parse_available_actions', 'summarize_last_turn', 'summarize_last_turn_async'],
+    "event_renderer": ['render_turn_events'],
+    "llm_cache": ['LLMCache', 'configure_cache', 'get_cache'],
+    "llm_scheduler": ['LLMScheduler', 'configure_scheduler', 'get_scheduler'],
+    "prompt_assembly": ['assemble_messages'],
+    "battle_context": ['BattleContext', 'BattleContextStore', 'get_battle_context'],
+    "action_resolver": ['ActionIndex', 'legal_actions', 'normalize_action_name', 'format_legal_actions'],
+    "llm_telemetry": ['start_turn_telemetry'],
+    "damage_calc": ['turn_damage', 'get_turn_damage', 'damage_ranges'],
+    "set_index": ['SetIndex', 'get_set_index', 'configure_set_index'],
+    "llm_client": ['chat_completion', 'chat_completion_async', 'chat_completion_stream_async', 'get_usage_stats', 'configure_backend', 'resolve_model',
+                   'get_client', 'get_async_client', 'configure_client', 'warm_up_client', 'warm_up_async_client', 'close_client', 'close_async_client'],
+}
+_LAZY = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = ['format_battle_prompt', 'move_prompt', 'memory_battle_state', 'opposition_state_gen', 'get_strategy', 'utils',
+           'format_battle_prompt_async', 'move_prompt_async', 'move_prompt_stream_async', 'build_move_request', 'parse_move_response', 'parse_available_actions', 'memory_battle_state_async', 'opposition_state_gen_async', 'get_strategy_async',
+           'render_turn_events', 'summarize_last_turn', 'summarize_last_turn_async',
+           'LLMCache', 'configure_cache', 'get_cache', 'chat_completion', 'chat_completion_async', 'chat_completion_stream_async', 'get_usage_stats', 'configure_backend', 'resolve_model', 'assemble_messages', 'start_turn_telemetry',
+           'LLMScheduler', 'configure_scheduler', 'get_scheduler',
+           'BattleContext', 'BattleContextStore', 'get_battle_context',
+           'ActionIndex', 'legal_actions', 'normalize_action_name', 'format_legal_actions',
+           'turn_damage', 'get_turn_damage', 'damage_ranges',
+           'SetIndex', 'get_set_index', 'configure_set_index',
+           'get_client', 'get_async_client', 'configure_client', 'warm_up_client', 'warm_up_async_client', 'close_client', 'close_async_client']
+
+def __getattr__(name):
+    if name == "utils":
+        return import_module(".utils", __name__)
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = import_module(f".{_LAZY[name]}", __name__)
+    # Bind every export of the module so later lookups skip __getattr__. This
+    # also replaces the submodule the import just bound to the package under
+    # the same name, e.g. prompts.move_prompt is the function, not the module.
+    for export in _EXPORTS[_LAZY[name]]:
+        globals()[export] = getattr(module, export)
+    return globals()[name]
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,74 @@
+import re
+
+# Maps the action names the LLM writes onto the battle's legal actions.
+# Showdown ids are lowercase alphanumerics ("knockoff", "ogerponwellspring"),
+# while models tend to write display names ("Knock Off", "Ogerpon-Wellspring")
+# or drop the form ("ogerpon"). Only switches are matched on a prefix: a
+# shortened or made-up move ("thunder", "close") is never swapped for a
+# different legal move, it is left unresolved so the caller can re-ask.
+
+MIN_PREFIX_LENGTH = 3
+
+def normalize_action_name(name):
+    """'Knock Off' / 'knock-off' -> 'knockoff', matching Showdown ids."""
+    return re.sub(r"[^a-z0-9]", "", (name or "").lower())
+
+def legal_actions(battle):
+    """
+    List the actions the player can take this turn.
+
+    Returns:
+        dict: {"move": [move ids], "switch": [species]}
+    """
+    return {
+        "move": [move.id for move in battle.available_moves],
+        "switch": [pokemon.species for pokemon in battle.available_switches]
+    }
+
+def format_legal_actions(actions):
+    """One line per action type, for re-asking the model."""
+    lines = []
+    if actions["move"]:
+        lines.append("Legal moves: " + ", ".join(actions["move"]))
+    if actions["switch"]:
+        lines.append("Legal switches: " + ", ".join(actions["switch"]))
+    return "\n".join(lines)
+
+class ActionIndex:
+    def __init__(self, actions):
+        """
+        Args:
+            actions (dict): {"move": [...], "switch": [...]} from legal_actions()
+        """
+        self.actions = actions
+        self.index = {}
+        for action_type in ("move", "switch"):
+            for name in actions[action_type]:
+                self.index.setdefault(normalize_action_name(name), (action_type, name))
+
+    def resolve(self, action_type, action_name):
+        """
+        Find the legal action the model meant.
+
+        Args:
+            action_type (str): 'move' or 'switch' as returned by the model
+            action_name (str): Name as returned by the model
+
+        Returns:
+            tuple: (action_type, action_name) of a legal action, or None
+        """
+        key = normalize_action_name(action_name)
+        if not key:
+            return None
+        if key in self.index:
+            return self.index[key]
+
+        # Species form mismatches, e.g. 'ogerpon' for 'ogerponwellspring'.
+        # Only switches, and only a unique match is accepted.
+        if action_type != "switch" or len(key) < MIN_PREFIX_LENGTH:
+            return None
+        candidates = [
+            action for name, action in self.index.items()
+            if action[0] == "switch" and (name.startswith(key) or key.startswith(name))
+        ]
+        return candidates[0] if len(candidates) == 1 else None
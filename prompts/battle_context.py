@@ -0,0 +1,75 @@
+from collections import OrderedDict
+import threading
+
+# Memory a player carries from one turn of a battle to the next. Each battle
+# gets its own context, keyed by battle_tag, so concurrent battles in one
+# process never see each other's history, thoughts or strategy.
+
+DEFAULT_MAX_BATTLES = 256
+
+class BattleContext:
+    def __init__(self, battle_tag):
+        self.battle_tag = battle_tag
+        # Summary of each turn's events, keyed by turn number
+        self.turn_summaries = {}
+        # Thought shown to the model on each turn, keyed by turn number
+        self.thoughts = {}
+        # Thought behind the most recent decision, fed into the next turn
+        self.last_thought = None
+        # Game plan written on turn 1 by InitialStrategyPlayer
+        self.strategy = None
+        # Rendered Pokemon blocks and their inputs, see state_renderer.py
+        self.render_cache = {}
+        # This decision's damage ranges and their inputs, see damage_calc.py
+        self.turn_damage = None
+
+    def record_turn(self, turn, summary):
+        """Store a turn's summary and return the one from the turn before, if known."""
+        self.turn_summaries[turn] = summary
+        return self.turn_summaries.get(turn - 1)
+
+    def record_thought(self, turn, thought):
+        """Store the thought shown on a turn and return the one from the turn before, if known."""
+        if thought:
+            self.thoughts[turn] = thought
+        return self.thoughts.get(turn - 1)
+
+class BattleContextStore:
+    def __init__(self, max_battles=DEFAULT_MAX_BATTLES):
+        """
+        Args:
+            max_battles (int): Contexts kept at most. The least recently used
+                one is evicted first, so battles that never reported their end
+                cannot leak memory.
+        """
+        self.max_battles = max_battles
+        self._contexts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, battle):
+        """Get (or create) the context for a battle."""
+        with self._lock:
+            context = self._contexts.get(battle.battle_tag)
+            if context is None:
+                context = BattleContext(battle.battle_tag)
+                self._contexts[battle.battle_tag] = context
+                while len(self._contexts) > self.max_battles:
+                    self._contexts.popitem(last=False)
+            else:
+                self._contexts.move_to_end(battle.battle_tag)
+            return context
+
+    def evict(self, battle_tag):
+        """Forget a finished battle."""
+        with self._lock:
+            self._contexts.pop(battle_tag, None)
+
+    def __len__(self):
+        return len(self._contexts)
+
+# Used by callers that don't manage their own store, e.g. TestPlayer
+_default_store = BattleContextStore()
+
+def get_battle_context(battle):
+    """Get the context for a battle from the shared default store."""
+    return _default_store.get(battle)
@@ -0,0 +1,282 @@
+import numpy as np
+from .utils import estimate_stats, estimate_team_stats, STAT_COLUMNS
+from .type_effectiveness import paired_type_multipliers
+
+# Damage ranges for a whole turn in one vectorized call: every available move
+# against the opponent's active Pokemon, the opponent's likely STAB hits
+# against our active Pokemon and each switch, and those of its revealed bench
+# against our active Pokemon. Uses the standard damage formula
+# with stats, boosts, burn, STAB, type effectiveness and the 85-100% roll.
+# Abilities, items, weather, crits and tera are not modelled. Opponent stats
+# come from estimate_stats, so their numbers are estimates, not exact ranges;
+# the 'guaranteed_ko' flag of our moves assumes the bulkiest possible spread.
+
+MIN_DAMAGE_ROLL = 0.85
+STAB_MULTIPLIER = 1.5
+BURN_MULTIPLIER = 0.5
+# Base power assumed for the opponent's unrevealed STAB moves
+THREAT_BASE_POWER = 80
+# Nature multiplier of a stat the nature boosts
+BOOSTING_NATURE = 1.1
+
+def _boost_multiplier(boost):
+    return (2 + boost) / 2 if boost >= 0 else 2 / (2 - boost)
+
+def estimate_max_hp(pokemon):
+    """Upper bound on a Pokemon's max HP (31 IVs, 252 EVs)."""
+    return (2 * pokemon.base_stats["hp"] + 31 + 63) * pokemon.level // 100 + pokemon.level + 10
+
+def estimate_max_defense(pokemon, stat):
+    """Upper bound on a Pokemon's 'def' or 'spd' stat (31 IVs, 252 EVs, boosting nature)."""
+    return int(((2 * pokemon.base_stats[stat] + 31 + 63) * pokemon.level // 100 + 5) * BOOSTING_NATURE)
+
+def _typing(pokemon):
+    return pokemon.type_1, pokemon.type_2
+
+def _is_burned(pokemon):
+    return pokemon.status is not None and pokemon.status.name == "BRN"
+
+def _stat(pokemon, stat):
+    """A known stat of one of our Pokemon, falling back to its base stat."""
+    return (pokemon.stats or {}).get(stat) or pokemon.base_stats[stat]
+
+def damage_ranges(level, power, attack, defense, multiplier, max_hp, current_hp, hits_min=1, hits_max=1):
+    """
+    Damage range of N attacks at once. Every argument is a length-N array (or
+    a scalar broadcast to N).
+
+    Args:
+        level: Attacker levels
+        power: Move base powers
+        attack: Attacking stat after boosts
+        defense: Defending stat after boosts
+        multiplier: STAB, type, burn and other modifiers combined
+        max_hp: Defender max HP
+        current_hp: Defender current HP
+        hits_min, hits_max: Fewest and most hits of multi-hit moves
+
+    Returns:
+        dict: Arrays 'min_percent' and 'max_percent' (% of max HP), 'ko'
+            (KO on the lowest roll) and 'possible_ko' (KO on the highest roll)
+    """
+    level, power, attack, defense, multiplier, max_hp, current_hp, hits_min, hits_max = (
+        np.asarray(value, dtype=float)
+        for value in (level, power, attack, defense, multiplier, max_hp, current_hp, hits_min, hits_max)
+    )
+    base = np.floor(np.floor(np.floor(2 * level / 5 + 2) * power * attack / np.maximum(defense, 1)) / 50) + 2
+    low = np.floor(base * MIN_DAMAGE_ROLL) * multiplier * hits_min
+    high = base * multiplier * hits_max
+    max_hp = np.maximum(max_hp, 1)
+    return {
+        "min_percent": 100 * low / max_hp,
+        "max_percent": 100 * high / max_hp,
+        "ko": (low >= current_hp) & (multiplier > 0),
+        "possible_ko": (high >= current_hp) & (multiplier > 0)
+    }
+
+def _move_rows(battle):
+    """Our available damaging moves against the opponent's active Pokemon."""
+    attacker = battle.active_pokemon
+    defender = battle.opponent_active_pokemon
+    estimated = estimate_stats(defender)
+    if attacker is None or not estimated:
+        return []
+    max_hp = estimate_max_hp(defender)
+
+    rows = []
+    for move in battle.available_moves:
+        if move.category.name == "STATUS" or not move.base_power:
+            continue
+        physical = move.category.name == "PHYSICAL"
+        attack_stat, defense_stat, estimated_defense = ("atk", "def", "defense") if physical else ("spa", "spd", "special-defense")
+        hits_min, hits_max = move.n_hit
+        rows.append({
+            "label": move.id,
+            "target": defender,
+            "level": attacker.level,
+            "power": move.base_power,
+            "attack": _stat(attacker, attack_stat) * _boost_multiplier(attacker.boosts[attack_stat]),
+            "defense": estimated[estimated_defense] * _boost_multiplier(defender.boosts[defense_stat]),
+            "max_defense": estimate_max_defense(defender, defense_stat) * _boost_multiplier(defender.boosts[defense_stat]),
+            "modifier": (STAB_MULTIPLIER if move.type in attacker.types else 1) * (BURN_MULTIPLIER if physical and _is_burned(attacker) else 1),
+            "type": move.type,
+            "typing": _typing(defender),
+            "max_hp": max_hp,
+            "current_hp": max_hp * defender.current_hp_fraction,
+            "hits": (hits_min, hits_max),
+            "move": move
+        })
+    return rows
+
+def _threat_rows(battle):
+    """
+    The opponent's likely STAB hits: its active Pokemon's against our active
+    Pokemon and each switch, its revealed bench's against our active Pokemon.
+    """
+    opponent = battle.opponent_active_pokemon
+    bench = [mon for mon in battle.opponent_team.values() if mon is not opponent and not mon.fainted]
+    # One batched (cached) estimate for the whole revealed team
+    attackers, estimates = estimate_team_stats([opponent] + bench)
+    if not attackers or battle.active_pokemon is None:
+        return []
+
+    rows = []
+    for attacker, estimated in zip(attackers, estimates):
+        estimated = dict(zip(STAT_COLUMNS, estimated))
+        active_attacker = attacker is opponent
+        # Assume the opponent attacks from its better side
+        physical = estimated["attack"] >= estimated["special-attack"]
+        attack_stat, defense_stat = ("atk", "def") if physical else ("spa", "spd")
+        # Boosts are lost on switching out, so only the active Pokemon keeps them
+        boost = _boost_multiplier(attacker.boosts[attack_stat]) if active_attacker else 1
+        attack = estimated["attack" if physical else "special-attack"] * boost
+        burn = BURN_MULTIPLIER if physical and _is_burned(attacker) else 1
+
+        targets = [(battle.active_pokemon, True)]
+        if active_attacker:
+            targets += [(pokemon, False) for pokemon in battle.available_switches]
+
+        for threat_type in [t for t in attacker.types if t is not None]:
+            for defender, active in targets:
+                boost = _boost_multiplier(defender.boosts[defense_stat]) if active else 1
+                rows.append({
+                    "label": threat_type.name,
+                    "attacker": attacker,
+                    "bench": not active_attacker,
+                    "target": defender,
+                    "active": active,
+                    "physical": physical,
+                    "level": attacker.level,
+                    "power": THREAT_BASE_POWER,
+                    "attack": attack,
+                    "defense": _stat(defender, defense_stat) * boost,
+                    "modifier": STAB_MULTIPLIER * burn,
+                    "type": threat_type,
+                    "typing": _typing(defender),
+                    "max_hp": defender.max_hp,
+                    "current_hp": defender.current_hp,
+                    "hits": (1, 1)
+                })
+    return rows
+
+def turn_damage(battle):
+    """
+    Damage ranges for the current turn, computed in one batched call.
+
+    Args:
+        battle: poke_env battle
+
+    Returns:
+        dict: {'moves': [...], 'threats': [...]}. Each entry is its row
+            (label, target, ...) plus min_percent, max_percent, ko and
+            possible_ko. Moves are labelled by move id, threats by attacking
+            type; threats from the opponent's bench have bench=True. Moves
+            also have guaranteed_ko, the lowest roll KOing even with maximum
+            defensive investment.
+    """
+    move_rows = _move_rows(battle)
+    threat_rows = _threat_rows(battle) if battle.opponent_active_pokemon is not None else []
+    rows = move_rows + threat_rows
+    if not rows:
+        return {"moves": [], "threats": []}
+
+    ranges = _ranges(rows, [row["defense"] for row in rows])
+    results = [
+        dict(row, **{name: values[i].item() for name, values in ranges.items()})
+        for i, row in enumerate(rows)
+    ]
+    # Our KOs are only guaranteed if they hold against the bulkiest spread
+    if move_rows:
+        bulky_ko = _ranges(move_rows, [row["max_defense"] for row in move_rows])["ko"]
+        for result, ko in zip(results, bulky_ko):
+            result["guaranteed_ko"] = ko.item()
+    return {"moves": results[:len(move_rows)], "threats": results[len(move_rows):]}
+
+def _ranges(rows, defense):
+    """damage_ranges() over turn_damage() rows, against the given defending stats."""
+    return damage_ranges(
+        level=[row["level"] for row in rows],
+        power=[row["power"] for row in rows],
+        attack=[row["attack"] for row in rows],
+        defense=defense,
+        multiplier=np.array([row["modifier"] for row in rows]) * paired_type_multipliers(
+            [row["type"] for row in rows], [row["typing"] for row in rows]
+        ),
+        max_hp=[row["max_hp"] for row in rows],
+        current_hp=[row["current_hp"] for row in rows],
+        hits_min=[row["hits"][0] for row in rows],
+        hits_max=[row["hits"][1] for row in rows]
+    )
+
+def _range_text(result):
+    if result["max_percent"] == 0:
+        return "no effect"
+    return f"{result['min_percent']:.0f}-{result['max_percent']:.0f}%{_ko_text(result)}"
+
+def _ko_text(result):
+    if result.get("guaranteed_ko", result["ko"]):
+        return " | guaranteed KO"
+    if result["possible_ko"]:
+        return " | possible KO"
+    return ""
+
+def render_damage(damage):
+    """
+    Render turn_damage() results for the battle state.
+
+    Returns:
+        list: Lines of the DAMAGE ESTIMATES section, empty if there is nothing to show
+    """
+    lines = []
+    if damage["moves"]:
+        target = damage["moves"][0]["target"]
+        lines.append(f"Your moves vs {target.species} ({target.current_hp_fraction * 100:.0f}% HP):")
+        for result in damage["moves"]:
+            lines.append(f"- {result['label']}: {_range_text(result)}")
+    threats = [result for result in damage["threats"] if not result["bench"]]
+    if threats:
+        lines.append(f"Opponent's likely STAB hits ({THREAT_BASE_POWER} base power, estimated stats):")
+        for result in threats:
+            target = result["target"]
+            role = "active" if result["active"] else "switch"
+            category = "physical" if result["physical"] else "special"
+            lines.append(
+                f"- {result['label']} ({category}) vs {target.species} ({role}, {target.current_hp_fraction * 100:.0f}% HP): "
+                f"{_range_text(result)}"
+            )
+    bench_threats = [result for result in damage["threats"] if result["bench"]]
+    if bench_threats:
+        target = bench_threats[0]["target"]
+        lines.append(f"Opponent's revealed bench vs your {target.species}:")
+        for result in bench_threats:
+            category = "physical" if result["physical"] else "special"
+            lines.append(f"- {result['attacker'].species} {result['label']} ({category}): {_range_text(result)}")
+    if not lines:
+        return []
+    return ["DAMAGE ESTIMATES (% of the target's max HP, lowest to highest roll)", "--------------"] + lines + [""]
+
+def _state_key(battle):
+    """Everything turn_damage() depends on that can change within a turn."""
+    pokemon = [battle.active_pokemon, battle.opponent_active_pokemon] + list(battle.available_switches)
+    return (
+        battle.turn,
+        tuple(move.id for move in battle.available_moves),
+        tuple(
+            (p.species, p.current_hp_fraction, p.status, tuple(sorted(p.boosts.items()))) if p is not None else None
+            for p in pokemon
+        )
+    )
+
+def get_turn_damage(battle, context):
+    """
+    turn_damage() for a battle, computed once per decision and kept on the
+    battle's context so the fast path and the state renderer share it.
+
+    Args:
+        battle: poke_env battle
+        context (BattleContext): The battle's context
+    """
+    key = _state_key(battle)
+    if context.turn_damage is None or context.turn_damage[0] != key:
+        context.turn_damage = (key, turn_damage(battle))
+    return context.turn_damage[1]
@@ -0,0 +1,255 @@
+from icecream import ic
+
+# Deterministic replacement for the LLM turn summary. Showdown protocol events
+# are rendered one sentence at a time in the same style as the examples in
+# battle_state_gen_user.txt.
+
+IGNORED_EVENTS = {
+    'init', 'title', 'gametype', 'player', 'teamsize', 'gen', 'tier', 'rule', 'j', 'upkeep',
+    'turn', '', 't:', 'poke', 'teampreview', 'clearpoke', 'raw', 'c', 'l', 'n', 'inactive',
+    'inactiveoff', 'timer', '-hint', '-message', 'request', 'win', 'tie', 'rated', 'badge'
+}
+
+STAT_NAMES = {
+    'atk': 'Attack',
+    'def': 'Defense',
+    'spa': 'Special Attack',
+    'spd': 'Special Defense',
+    'spe': 'Speed',
+    'accuracy': 'accuracy',
+    'evasion': 'evasion'
+}
+
+STATUS_TEXT = {
+    'brn': 'was burned',
+    'par': 'was paralyzed',
+    'psn': 'was poisoned',
+    'tox': 'was badly poisoned',
+    'slp': 'fell asleep',
+    'frz': 'was frozen solid'
+}
+
+CANT_REASONS = {
+    'slp': 'it is asleep',
+    'par': 'it is paralyzed',
+    'frz': 'it is frozen',
+    'flinch': 'it flinched',
+    'recharge': 'it must recharge',
+    'nopp': 'it has no PP left'
+}
+
+WEATHER_START = {
+    'sunnyday': 'The sunlight turned harsh',
+    'desolateland': 'The sunlight turned extremely harsh',
+    'raindance': 'It started to rain',
+    'primordialsea': 'A heavy rain began to fall',
+    'sandstorm': 'A sandstorm kicked up',
+    'hail': 'It started to hail',
+    'snow': 'It started to snow',
+    'snowscape': 'It started to snow',
+    'deltastream': 'Mysterious strong winds began to blow'
+}
+
+WEATHER_UPKEEP = {
+    'sunnyday': 'The sunlight is strong',
+    'desolateland': 'The sunlight is extremely harsh',
+    'raindance': 'Rain continues to fall',
+    'primordialsea': 'The heavy rain continues',
+    'sandstorm': 'The sandstorm rages',
+    'hail': 'Hail continues to fall',
+    'snow': 'Snow continues to fall',
+    'snowscape': 'Snow continues to fall',
+    'deltastream': 'The strong winds continue to blow'
+}
+
+def _to_id(text):
+    return ''.join(c for c in text.lower() if c.isalnum())
+
+def _name(identifier):
+    """'p2a: Kleavor' -> 'Kleavor'"""
+    return identifier.split(': ', 1)[1] if ': ' in identifier else identifier
+
+def _side(identifier):
+    """'p2a: Kleavor' or 'p2: username' -> 'p2'"""
+    return identifier[:2]
+
+def _hp_percent(condition):
+    """'127/237 par' -> 54, '0 fnt' -> 0"""
+    hp = condition.split(' ')[0]
+    if '/' not in hp:
+        return 0
+    current, maximum = hp.split('/')
+    try:
+        return round(int(current) / int(maximum) * 100)
+    except (ValueError, ZeroDivisionError):
+        return 0
+
+def _source(args):
+    """Return the text of a '[from] ...' tag, e.g. 'item: Leftovers' -> 'Leftovers'"""
+    for arg in args:
+        if arg.startswith('[from]'):
+            source = arg[len('[from]'):].strip()
+            return source.split(': ', 1)[1] if ': ' in source else source
+    return None
+
+def _side_owner(side, player_role):
+    if player_role is None:
+        return f"{side}'s side"
+    return "your side" if side == player_role else "the opponent's side"
+
+def _effect_name(effect):
+    """'move: Stealth Rock' -> 'Stealth Rock'"""
+    return effect.split(': ', 1)[1] if ': ' in effect else effect
+
+def _render_event(event, player_role=None):
+    kind = event[1]
+    args = event[2:]
+
+    if kind in IGNORED_EVENTS:
+        return None
+    if kind == 'start':
+        return "The battle has started."
+    if kind in ('switch', 'drag') and len(args) >= 3:
+        verb = "was switched in" if kind == 'switch' else "was dragged in"
+        return f"{_name(args[0])} {verb} at {_hp_percent(args[2])}% HP."
+    if kind == 'move' and len(args) >= 2:
+        user = _name(args[0])
+        target = _name(args[2]) if len(args) >= 3 and args[2] and not args[2].startswith('[') else None
+        missed = any(arg == '[miss]' for arg in args)
+        if target and target != user:
+            sentence = f"{user} used {args[1]} against {target}"
+        else:
+            sentence = f"{user} used {args[1]}"
+        return sentence + (", but it missed." if missed else ".")
+    if kind == '-damage' and len(args) >= 2:
+        source = _source(args)
+        if source:
+            return f"{_name(args[0])} took damage from {source} and is now at {_hp_percent(args[1])}% HP."
+        return f"{_name(args[0])} was left at {_hp_percent(args[1])}% HP."
+    if kind == '-heal' and len(args) >= 2:
+        source = _source(args)
+        if source:
+            return f"{_name(args[0])} healed to {_hp_percent(args[1])}% HP from {source}."
+        return f"{_name(args[0])} healed to {_hp_percent(args[1])}% HP."
+    if kind == '-sethp' and len(args) >= 2:
+        return f"{_name(args[0])}'s HP is now {_hp_percent(args[1])}%."
+    if kind in ('-boost', '-unboost') and len(args) >= 3:
+        stat = STAT_NAMES.get(args[1], args[1])
+        stages = int(args[2]) if args[2].isdigit() else 1
+        direction = "rose" if kind == '-boost' else "fell"
+        if stages == 0:
+            return f"{_name(args[0])}'s {stat} won't go any {'higher' if kind == '-boost' else 'lower'}."
+        return f"{_name(args[0])}'s {stat} {direction} by {stages} stage{'s' if stages > 1 else ''}."
+    if kind == '-setboost' and len(args) >= 3:
+        return f"{_name(args[0])}'s {STAT_NAMES.get(args[1], args[1])} was set to +{args[2]}."
+    if kind in ('-clearboost', '-clearallboost', '-clearnegativeboost'):
+        if args:
+            return f"{_name(args[0])}'s stat changes were removed."
+        return "All stat changes were removed."
+    if kind == '-status' and len(args) >= 2:
+        return f"{_name(args[0])} {STATUS_TEXT.get(args[1], 'was afflicted with ' + args[1])}."
+    if kind == '-curestatus' and len(args) >= 1:
+        return f"{_name(args[0])} was cured of its status condition."
+    if kind == 'faint' and args:
+        return f"{_name(args[0])} fainted."
+    if kind == 'cant' and args:
+        if len(args) >= 2 and args[1] in CANT_REASONS:
+            return f"{_name(args[0])} could not move because {CANT_REASONS[args[1]]}."
+        if len(args) >= 2:
+            return f"{_name(args[0])} could not move ({_effect_name(args[1])})."
+        return f"{_name(args[0])} could not move."
+    if kind == '-supereffective':
+        return "It was super effective."
+    if kind == '-resisted':
+        return "It was not very effective."
+    if kind == '-immune' and args:
+        return f"It had no effect on {_name(args[0])}."
+    if kind == '-crit':
+        return "It was a critical hit."
+    if kind == '-miss' and args:
+        return f"{_name(args[0])}'s attack missed."
+    if kind == '-fail' and args:
+        return f"{_name(args[0])}'s move failed."
+    if kind == '-weather' and args:
+        weather = _to_id(args[0])
+        if weather == 'none':
+            return "The weather cleared up."
+        if '[upkeep]' in args:
+            return f"{WEATHER_UPKEEP.get(weather, args[0] + ' continues')}."
+        return f"{WEATHER_START.get(weather, args[0] + ' started')}."
+    if kind == '-fieldstart' and args:
+        return f"{_effect_name(args[0])} took effect on the field."
+    if kind == '-fieldend' and args:
+        return f"{_effect_name(args[0])} wore off."
+    if kind == '-sidestart' and len(args) >= 2:
+        return f"{_effect_name(args[1])} was set up on {_side_owner(_side(args[0]), player_role)}."
+    if kind == '-sideend' and len(args) >= 2:
+        return f"{_effect_name(args[1])} was removed from {_side_owner(_side(args[0]), player_role)}."
+    if kind == '-ability' and len(args) >= 2:
+        return f"{_name(args[0])}'s {args[1]} ability activated."
+    if kind == '-item' and len(args) >= 2:
+        return f"{_name(args[0])} was revealed to hold {args[1]}."
+    if kind == '-enditem' and len(args) >= 2:
+        return f"{_name(args[0])}'s {args[1]} was used up."
+    if kind == '-start' and len(args) >= 2:
+        effect = _effect_name(args[1])
+        if _to_id(effect) == 'confusion':
+            return f"{_name(args[0])} became confused."
+        return f"{_name(args[0])} is affected by {effect}."
+    if kind == '-end' and len(args) >= 2:
+        return f"{_effect_name(args[1])} ended for {_name(args[0])}."
+    if kind == '-terastallize' and len(args) >= 2:
+        return f"{_name(args[0])} terastallized into the {args[1]} type."
+    if kind in ('detailschange', '-formechange') and len(args) >= 2:
+        return f"{_name(args[0])} changed form to {args[1].split(',')[0]}."
+    if kind == '-activate' and len(args) >= 2:
+        return f"{_effect_name(args[1])} activated for {_name(args[0])}."
+    if kind == '-prepare' and len(args) >= 2:
+        return f"{_name(args[0])} is preparing {args[1]}."
+    if kind == '-mustrecharge' and args:
+        return f"{_name(args[0])} must recharge."
+    if kind == '-transform' and len(args) >= 2:
+        return f"{_name(args[0])} transformed into {_name(args[1])}."
+
+    # Unknown events are passed through so no information is lost
+    return ' '.join(event[1:])
+
+def render_turn_events(events, player_role=None):
+    """
+    Translate Showdown protocol events into a short English paragraph without
+    calling an LLM.
+
+    Args:
+        events: List of battle events from the last turn
+        player_role (str): 'p1' or 'p2', used to label hazards as yours or the opponent's
+
+    Returns:
+        str: Natural language description of the events
+    """
+    sentences = []
+    for event in events:
+        if len(event) < 2:
+            continue
+        sentence = _render_event(event, player_role)
+        if sentence:
+            sentences.append(sentence)
+
+    if not sentences:
+        return "Nothing of note happened."
+    return ' '.join(sentences)
+
+def render_test():
+    events = [['', 'move', 'p2a: Kleavor', 'Close Combat', 'p1a: Swalot'],
+              ['', '-resisted', 'p1a: Swalot'],
+              ['', '-damage', 'p1a: Swalot', '58/100'],
+              ['', '-unboost', 'p2a: Kleavor', 'def', '1'],
+              ['', '-unboost', 'p2a: Kleavor', 'spd', '1'],
+              ['', 'move', 'p1a: Swalot', 'Earthquake', 'p2a: Kleavor'],
+              ['', '-damage', 'p2a: Kleavor', '127/237'],
+              ['', '-heal', 'p1a: Swalot', '64/100', '[from] item: Leftovers'],
+              ['', 'upkeep'],
+              ['', 'turn', '15']]
+    ic(render_turn_events(events, player_role='p1'))
+
+if __name__ == "__main__":
+    render_test()
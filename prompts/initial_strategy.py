@@ -1,10 +1,10 @@
-from openai import OpenAI
-from dotenv import load_dotenv, find_dotenv
 from icecream import ic
 import json
 from .utils import load_prompt
+from .llm_client import chat_completion, chat_completion_async
+from .llm_scheduler import PRIORITY_STRATEGY
 
-def get_strategy(battle_state, model='gpt-4o'):
+def _build_strategy_request(battle_state, model):
 
     # Parse battle state to only look at own team:
     team_description = battle_state.split("YOUR STATUS\n----------")[1]
@@ -18,9 +18,7 @@ def get_strategy(battle_state, model='gpt-4o'):
         "human": user_message,
     }
 
-    load_dotenv(find_dotenv())
-    client = OpenAI()
-    response = client.chat.completions.create(
+    return dict(
         model=model,
         messages=[
             {"role": "system", "content": prompt["system"]},
@@ -29,4 +27,11 @@ def get_strategy(battle_state, model='gpt-4o'):
         temperature=1
     )
 
+def get_strategy(battle_state, model='gpt-4o', use_cache=True):
+    response = chat_completion(_build_strategy_request(battle_state, model), use_cache=use_cache, priority=PRIORITY_STRATEGY)
+    return response.choices[0].message.content
+
+async def get_strategy_async(battle_state, model='gpt-4o', use_cache=True):
+    """Awaitable version of get_strategy()."""
+    response = await chat_completion_async(_build_strategy_request(battle_state, model), use_cache=use_cache, priority=PRIORITY_STRATEGY)
     return response.choices[0].message.content
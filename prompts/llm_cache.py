@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Cache settings. These can be overridden with the LLM_CACHE_PATH and
+# LLM_CACHE_SIZE environment variables or by calling configure_cache().
+DEFAULT_CACHE_PATH = "llm_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 10000
+# Cache hits whose last_access update is buffered before it is written
+ACCESS_FLUSH_SIZE = 64
+
+class LLMCache:
+    """
+    Disk-backed cache of chat completion responses.
+
+    Entries are keyed on a hash of the full request (model, messages, function
+    schema, temperature, ...) and evicted least-recently-used first once the
+    cache grows past max_entries. Hits update last_access in memory and the
+    updates are written in batches, on put() or every ACCESS_FLUSH_SIZE hits.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Access times of cache hits not yet written, by key
+        self._pending_access = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets readers and the writer proceed together, and NORMAL only
+        # syncs at checkpoints; a crash can at worst lose the latest entries
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(request):
+        """Hash a chat completion request into a cache key."""
+        payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached response JSON for key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._pending_access[key] = time.time()
+            if len(self._pending_access) >= ACCESS_FLUSH_SIZE:
+                self._flush_access()
+                self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def _flush_access(self):
+        """Write the buffered last_access updates. Call with the lock held."""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+
+    def put(self, key, response):
+        """Store a response JSON string and evict the oldest entries if over capacity."""
+        with self._lock:
+            # Eviction below must see recent hits as recently used
+            self._flush_access()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, last_access) VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._pending_access.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0,
+            "entries": entries,
+            "max_entries": self.max_entries
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+            self._conn.close()
+
+_cache = None
+_cache_enabled = True
+_cache_lock = threading.Lock()
+
+def configure_cache(path=None, max_entries=None, enabled=True):
+    """
+    Configure the shared response cache.
+
+    Args:
+        path (str): SQLite file to store responses in
+        max_entries (int): Number of responses kept before LRU eviction
+        enabled (bool): Set to False to disable caching for the whole process
+    """
+    global _cache, _cache_enabled
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
+        _cache_enabled = enabled
+        if enabled and (path is not None or max_entries is not None):
+            _cache = LLMCache(
+                path or os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_entries or int(os.getenv("LLM_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+            )
+
+def get_cache():
+    """
+    Get the process-wide response cache, creating it on first use.
+
+    Returns:
+        LLMCache: The shared cache, or None if caching is disabled
+    """
+    global _cache
+    if not _cache_enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and _cache_enabled:
+                _cache = LLMCache(
+                    os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                    int(os.getenv("LLM_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+                )
+    return _cache
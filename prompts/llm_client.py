@@ -0,0 +1,334 @@
+import asyncio
+import os
+import threading
+import time
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from openai.types.chat import ChatCompletion
+from .llm_cache import get_cache, LLMCache
+from .llm_scheduler import get_scheduler, estimate_tokens, PRIORITY_MOVE
+from .llm_telemetry import record_call
+
+# Connection pool settings. The pool size can be overridden with the
+# LLM_POOL_SIZE environment variable or by calling configure_client().
+DEFAULT_POOL_SIZE = 20
+KEEPALIVE_EXPIRY = 120
+
+_client = None
+_async_client = None
+_usage_lock = threading.Lock()
+_usage_totals = {
+    "requests": 0,
+    "prompt_tokens": 0,
+    "cached_tokens": 0,
+    "completion_tokens": 0
+}
+_client_lock = threading.Lock()
+_pool_size = None
+_backend = None
+
+def _load_env():
+    """Read .env on first use of the client, not when the package is imported."""
+    from dotenv import load_dotenv, find_dotenv
+    load_dotenv(find_dotenv())
+
+def _get_pool_size():
+    if _pool_size is not None:
+        return _pool_size
+    return int(os.getenv("LLM_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+def _build_limits(pool_size):
+    return httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+
+def _parse_aliases(text):
+    """'gpt-4o=mock,gpt-4o-mini=mock' -> {'gpt-4o': 'mock', 'gpt-4o-mini': 'mock'}"""
+    aliases = {}
+    for pair in (text or "").split(","):
+        if "=" in pair:
+            name, target = pair.split("=", 1)
+            aliases[name.strip()] = target.strip()
+    return aliases
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        _load_env()
+        timeout = os.getenv("LLM_TIMEOUT")
+        _backend = {
+            "base_url": os.getenv("LLM_BASE_URL") or None,
+            "timeout": float(timeout) if timeout else None,
+            "model_aliases": _parse_aliases(os.getenv("LLM_MODEL_ALIASES"))
+        }
+    return _backend
+
+def _reset_clients():
+    global _client, _async_client
+    if _client is not None:
+        _client.close()
+        _client = None
+    # The async client can only be closed from its event loop, see
+    # close_async_client(). Dropping it here releases it to the GC.
+    _async_client = None
+
+def configure_client(pool_size=None):
+    """
+    Configure the shared LLM client. Any existing client is closed so the
+    next call to get_client() picks up the new settings.
+
+    Args:
+        pool_size (int): Maximum number of pooled keep-alive connections
+    """
+    global _pool_size
+    with _client_lock:
+        _pool_size = pool_size
+        _reset_clients()
+
+def configure_backend(base_url=None, model_aliases=None, timeout=None):
+    """
+    Point every LLM call at an OpenAI-compatible backend. Defaults come from
+    the LLM_BASE_URL, LLM_MODEL_ALIASES and LLM_TIMEOUT environment variables;
+    with nothing set the OpenAI API is used.
+
+    Args:
+        base_url (str): API root, e.g. 'http://localhost:8000/v1' for mock_llm_server.py
+        model_aliases (dict): Maps the model names players ask for to the
+            names the backend serves, e.g. {'gpt-4o': 'llama3'}
+        timeout (float): Per-request timeout in seconds
+    """
+    global _backend
+    with _client_lock:
+        _backend = {
+            "base_url": base_url,
+            "timeout": timeout,
+            "model_aliases": dict(model_aliases or {})
+        }
+        _reset_clients()
+
+def resolve_model(model):
+    """Map a requested model name through the backend's aliases."""
+    return _get_backend()["model_aliases"].get(model, model)
+
+def _client_kwargs():
+    backend = _get_backend()
+    kwargs = {
+        # A local backend usually needs no key, but the client requires one
+        "api_key": os.getenv("OPENAI_API_KEY") or ("local" if backend["base_url"] else None),
+        # Retries are handled by the scheduler, see llm_scheduler.py
+        "max_retries": 0
+    }
+    if backend["base_url"]:
+        kwargs["base_url"] = backend["base_url"]
+    if backend["timeout"]:
+        kwargs["timeout"] = backend["timeout"]
+    return kwargs
+
+def _prepare_request(request):
+    """Resolve model aliases and build the cache key for a request."""
+    request = dict(request, model=resolve_model(request.get("model")))
+    base_url = _get_backend()["base_url"]
+    # Responses from different backends must not share cache entries
+    key = LLMCache.make_key(dict(request, base_url=base_url) if base_url else request)
+    return request, key
+
+def get_client():
+    """
+    Get the process-wide OpenAI client, creating it on first use.
+
+    Returns:
+        OpenAI: Client backed by a keep-alive connection pool
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _load_env()
+                _client = OpenAI(
+                    **_client_kwargs(),
+                    http_client=httpx.Client(limits=_build_limits(_get_pool_size()))
+                )
+    return _client
+
+def get_async_client():
+    """
+    Get the process-wide AsyncOpenAI client, creating it on first use.
+    Awaiting calls on this client lets other battles keep running on the
+    event loop while a request is in flight.
+
+    Returns:
+        AsyncOpenAI: Client backed by a keep-alive connection pool
+    """
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _load_env()
+                _async_client = AsyncOpenAI(
+                    **_client_kwargs(),
+                    http_client=httpx.AsyncClient(limits=_build_limits(_get_pool_size()))
+                )
+    return _async_client
+
+def _record_usage(response):
+    """Add a response's token usage, including provider-cached prompt tokens, to the totals."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    with _usage_lock:
+        _usage_totals["requests"] += 1
+        _usage_totals["prompt_tokens"] += usage.prompt_tokens or 0
+        _usage_totals["completion_tokens"] += usage.completion_tokens or 0
+        _usage_totals["cached_tokens"] += (getattr(details, "cached_tokens", None) or 0) if details else 0
+
+def get_usage_stats():
+    """
+    Get token usage of API requests made by this process (local cache hits excluded).
+
+    Returns:
+        dict: Request and token totals plus the share of prompt tokens served
+            from the provider's prompt cache
+    """
+    with _usage_lock:
+        stats = dict(_usage_totals)
+    stats["cached_prompt_ratio"] = stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] > 0 else 0
+    return stats
+
+def chat_completion(request, use_cache=True, priority=PRIORITY_MOVE):
+    """
+    Run a chat completion through the shared client, serving it from the
+    response cache when an identical request has been made before. Requests
+    that reach the API go through the shared rate-limit scheduler.
+
+    Args:
+        request (dict): Keyword arguments for chat.completions.create
+        use_cache (bool): Set to False for live sampling where a fresh
+            temperature > 0 response is wanted
+        priority (int): Scheduler priority, one of llm_scheduler.PRIORITY_*.
+            Also labels the call in the per-turn telemetry.
+
+    Returns:
+        ChatCompletion: The (possibly cached) response
+    """
+    start = time.perf_counter()
+    request, key = _prepare_request(request)
+    cache = get_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            response = ChatCompletion.model_validate_json(cached)
+            record_call(priority, request.get("model"), time.perf_counter() - start, response, cache_hit=True)
+            return response
+
+    response, retries = get_scheduler().submit_sync(
+        lambda: get_client().chat.completions.create(**request),
+        priority=priority,
+        estimated_tokens=estimate_tokens(request)
+    )
+    _record_usage(response)
+    record_call(priority, request.get("model"), time.perf_counter() - start, response, retries=retries)
+
+    if cache is not None:
+        cache.put(key, response.model_dump_json())
+    return response
+
+async def chat_completion_async(request, use_cache=True, priority=PRIORITY_MOVE):
+    """Awaitable version of chat_completion()."""
+    start = time.perf_counter()
+    request, key = _prepare_request(request)
+    cache = get_cache() if use_cache else None
+    if cache is not None:
+        # SQLite I/O runs in a worker thread so it never blocks the event loop
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            response = ChatCompletion.model_validate_json(cached)
+            record_call(priority, request.get("model"), time.perf_counter() - start, response, cache_hit=True)
+            return response
+
+    response, retries = await get_scheduler().submit(
+        lambda: get_async_client().chat.completions.create(**request),
+        priority=priority,
+        estimated_tokens=estimate_tokens(request)
+    )
+    _record_usage(response)
+    record_call(priority, request.get("model"), time.perf_counter() - start, response, retries=retries)
+
+    if cache is not None:
+        await asyncio.to_thread(cache.put, key, response.model_dump_json())
+    return response
+
+async def chat_completion_stream_async(request, priority=PRIORITY_MOVE):
+    """
+    Stream a chat completion through the shared client and scheduler,
+    yielding function-call argument text (or message content) as it arrives.
+    Streams always reach the backend; the response cache is not used.
+
+    Args:
+        request (dict): Keyword arguments for chat.completions.create
+        priority (int): Scheduler priority, one of llm_scheduler.PRIORITY_*
+
+    Yields:
+        str: The next chunk of text
+    """
+    start = time.perf_counter()
+    request, _ = _prepare_request(request)
+    # The scheduler slot is held until the stream has been read or closed
+    stream, finish, retries = await get_scheduler().submit_stream(
+        lambda: get_async_client().chat.completions.create(**request, stream=True, stream_options={"include_usage": True}),
+        priority=priority,
+        estimated_tokens=estimate_tokens(request)
+    )
+
+    # Usage arrives on a final chunk without choices
+    usage_chunk = None
+    completed = False
+    try:
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage_chunk = chunk
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.function_call is not None and delta.function_call.arguments:
+                yield delta.function_call.arguments
+            elif delta.content:
+                yield delta.content
+        completed = True
+    finally:
+        try:
+            await stream.close()
+        finally:
+            finish(usage_chunk, completed)
+        _record_usage(usage_chunk)
+        record_call(priority, request.get("model"), time.perf_counter() - start, usage_chunk, retries=retries)
+
+def warm_up_client():
+    """
+    Open a connection to the API ahead of the first prompt so the first turn
+    does not pay for DNS, TCP and TLS setup. Failures are not fatal.
+    """
+    try:
+        get_client().models.list()
+    except Exception as e:
+        print(f"Error warming up LLM client: {e}")
+
+async def warm_up_async_client():
+    """Async counterpart of warm_up_client()."""
+    try:
+        await get_async_client().models.list()
+    except Exception as e:
+        print(f"Error warming up LLM client: {e}")
+
+def close_client():
+    """Close the shared client and its connection pool."""
+    configure_client(_pool_size)
+
+async def close_async_client():
+    """Close the shared async client and its connection pool."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
@@ -0,0 +1,320 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+import openai
+
+# Request priorities, lower runs first. Move decisions are on the battle
+# timer, summaries feed the next decision, strategy can wait.
+PRIORITY_MOVE = 0
+PRIORITY_SUMMARY = 1
+PRIORITY_STRATEGY = 2
+
+# Errors worth retrying. Anything else (bad request, auth, ...) is raised at once.
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError
+)
+
+class TokenBucket:
+    """Continuously refilling budget of `per_minute` units."""
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.rate = per_minute / 60
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount):
+        """Seconds until `amount` units are available (0 if available now)."""
+        with self._lock:
+            self._refill()
+            # Requests larger than the bucket wait for a full bucket
+            amount = min(amount, self.capacity)
+            if self.tokens >= amount:
+                return 0
+            return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        """Take `amount` units. The balance may go negative to record debt."""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+
+class LLMScheduler:
+    """
+    Central gate in front of every LLM request.
+
+    - Token buckets keep requests and tokens under the account's RPM/TPM limits.
+    - Retryable errors are retried with jittered exponential backoff, honouring
+      the server's retry-after header when present.
+    - Waiting async requests are served by priority, so move decisions go
+      ahead of turn summaries and strategy generation.
+    - The number of requests in flight adapts to observed behaviour: it grows
+      additively while latency is stable and halves on rate limit errors or
+      when latency climbs well above its baseline.
+    """
+    def __init__(self, rpm=None, tpm=None, max_concurrency=32, min_concurrency=1,
+                 max_retries=5, base_delay=1.0, max_delay=30.0):
+        self.rpm = TokenBucket(rpm) if rpm else None
+        self.tpm = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(min(max_concurrency, 4))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.in_flight = 0
+        self.latency_ewma = None
+        self.latency_baseline = None
+        self.rate_limited = 0
+        self.retries = 0
+
+        self._waiters = []
+        self._seq = itertools.count()
+        self._timer = None
+        self._lock = threading.Lock()
+
+    # Budget
+
+    def _budget_delay(self, tokens):
+        delay = 0
+        if self.rpm:
+            delay = max(delay, self.rpm.delay_for(1))
+        if self.tpm:
+            delay = max(delay, self.tpm.delay_for(tokens))
+        return delay
+
+    def _consume(self, tokens):
+        if self.rpm:
+            self.rpm.consume(1)
+        if self.tpm:
+            self.tpm.consume(tokens)
+
+    def _settle_tokens(self, estimated, used):
+        # Correct the TPM bucket once the real usage is known
+        if self.tpm and used is not None:
+            self.tpm.consume(used - estimated)
+
+    # Adaptive concurrency
+
+    def _record_success(self, latency):
+        with self._lock:
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+                self.latency_baseline = latency
+            else:
+                self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+                self.latency_baseline = min(self.latency_baseline * 1.01, self.latency_ewma)
+
+            if self.latency_ewma > 2 * self.latency_baseline:
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * 0.9)
+            else:
+                self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+
+    def _record_failure(self, error):
+        with self._lock:
+            self.retries += 1
+            if isinstance(error, openai.RateLimitError):
+                self.rate_limited += 1
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+
+    def _retry_delay(self, attempt, error):
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            try:
+                if retry_after is not None:
+                    return min(self.max_delay, float(retry_after)) + random.uniform(0, self.base_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    # Async path
+
+    def _wake(self):
+        self._timer = None
+        while self._waiters and self.in_flight < int(self.concurrency_limit):
+            priority, seq, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._budget_delay(tokens)
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+                return
+            heapq.heappop(self._waiters)
+            self._consume(tokens)
+            self.in_flight += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority, tokens):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), tokens, future))
+        if self._timer is None:
+            self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just before cancellation, hand it back
+                self._release()
+            raise
+
+    def _release(self):
+        self.in_flight -= 1
+        if self._timer is None:
+            self._wake()
+
+    async def _run(self, call, priority, estimated_tokens):
+        """Run `call` in a concurrency slot with retries. The slot is still held on return."""
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, estimated_tokens)
+            start = time.monotonic()
+            try:
+                result = await call()
+            except RETRYABLE_ERRORS as e:
+                self._release()
+                self._record_failure(e)
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt, e))
+                continue
+            except BaseException:
+                self._release()
+                raise
+            return result, attempt, start
+
+    async def submit(self, call, priority=PRIORITY_MOVE, estimated_tokens=0):
+        """
+        Run an async LLM call under the scheduler.
+
+        Args:
+            call: Zero-argument function returning an awaitable API call
+            priority (int): One of the PRIORITY_* constants
+            estimated_tokens (int): Expected prompt + completion tokens
+
+        Returns:
+            tuple: (result of the call, number of retries it took)
+        """
+        result, attempt, start = await self._run(call, priority, estimated_tokens)
+        self._release()
+        self._record_success(time.monotonic() - start)
+        self._settle_tokens(estimated_tokens, _total_tokens(result))
+        return result, attempt
+
+    async def submit_stream(self, call, priority=PRIORITY_MOVE, estimated_tokens=0):
+        """
+        Open a streamed LLM call under the scheduler. The concurrency slot is
+        held while the stream is read, until the returned finish(last_chunk,
+        completed) is called. That releases the slot and, for a stream read
+        to the end, records its full duration as the latency.
+
+        Args:
+            call: Zero-argument function returning an awaitable that opens the stream
+            priority (int): One of the PRIORITY_* constants
+            estimated_tokens (int): Expected prompt + completion tokens
+
+        Returns:
+            tuple: (stream, finish callback, number of retries it took)
+        """
+        stream, attempt, start = await self._run(call, priority, estimated_tokens)
+        finished = False
+
+        def finish(last_chunk=None, completed=True):
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            self._release()
+            if completed:
+                self._record_success(time.monotonic() - start)
+            self._settle_tokens(estimated_tokens, _total_tokens(last_chunk))
+
+        return stream, finish, attempt
+
+    # Sync path (scripts and worker threads). No prioritisation.
+
+    def submit_sync(self, call, priority=PRIORITY_MOVE, estimated_tokens=0):
+        """Blocking version of submit()."""
+        for attempt in range(self.max_retries + 1):
+            delay = self._budget_delay(estimated_tokens)
+            while delay > 0:
+                time.sleep(delay)
+                delay = self._budget_delay(estimated_tokens)
+            self._consume(estimated_tokens)
+            start = time.monotonic()
+            try:
+                result = call()
+            except RETRYABLE_ERRORS as e:
+                self._record_failure(e)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt, e))
+                continue
+            self._record_success(time.monotonic() - start)
+            self._settle_tokens(estimated_tokens, _total_tokens(result))
+            return result, attempt
+
+    def stats(self):
+        return {
+            "concurrency_limit": round(self.concurrency_limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "latency_ewma": self.latency_ewma,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited
+        }
+
+def _total_tokens(response):
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage else None
+
+def estimate_tokens(request):
+    """Rough token estimate for a chat request: ~4 characters per token plus the completion budget."""
+    chars = sum(len(message.get("content") or "") for message in request.get("messages", []))
+    chars += sum(len(str(function)) for function in request.get("functions", []))
+    return chars // 4 + request.get("max_tokens", 500)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def configure_scheduler(rpm=None, tpm=None, **kwargs):
+    """
+    Configure the shared scheduler. Limits default to the LLM_RPM and LLM_TPM
+    environment variables; unset means unlimited.
+
+    Args:
+        rpm (int): Requests per minute allowed for the account
+        tpm (int): Tokens per minute allowed for the account
+        **kwargs: Passed through to LLMScheduler
+    """
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = LLMScheduler(rpm=rpm, tpm=tpm, **kwargs)
+    return _scheduler
+
+def get_scheduler():
+    """Get the process-wide scheduler, creating it from the environment on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                rpm = os.getenv("LLM_RPM")
+                tpm = os.getenv("LLM_TPM")
+                _scheduler = LLMScheduler(
+                    rpm=int(rpm) if rpm else None,
+                    tpm=int(tpm) if tpm else None
+                )
+    return _scheduler
@@ -0,0 +1,53 @@
+import contextvars
+from .llm_scheduler import PRIORITY_MOVE, PRIORITY_SUMMARY, PRIORITY_STRATEGY
+
+# Per-turn record of LLM calls. A player starts a new list at the beginning of
+# choose_move; every call made from that task (and tasks it spawns, which
+# inherit the context) appends to it, so concurrent battles never mix records.
+_turn_calls = contextvars.ContextVar("llm_turn_calls", default=None)
+
+PURPOSES = {
+    PRIORITY_MOVE: "move",
+    PRIORITY_SUMMARY: "summary",
+    PRIORITY_STRATEGY: "strategy"
+}
+
+def start_turn_telemetry():
+    """
+    Start collecting LLM call records for the current turn.
+
+    Returns:
+        list: The list records are appended to, to be passed to log_turn
+    """
+    calls = []
+    _turn_calls.set(calls)
+    return calls
+
+def record_call(priority, model, wall_time, response=None, retries=0, cache_hit=False):
+    """
+    Record one LLM call on the current turn, if one is being collected.
+
+    Args:
+        priority (int): Scheduler priority, used to label the call's purpose
+        model (str): Model the request was sent to
+        wall_time (float): Seconds from request to parsed response
+        response: ChatCompletion, used for token usage
+        retries (int): Number of retries the scheduler needed
+        cache_hit (bool): Whether the response came from the local cache
+    """
+    calls = _turn_calls.get()
+    if calls is None:
+        return
+
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None) if usage else None
+    calls.append({
+        "purpose": PURPOSES.get(priority, str(priority)),
+        "model": model,
+        "wall_time": round(wall_time, 4),
+        "prompt_tokens": 0 if cache_hit or usage is None else usage.prompt_tokens,
+        "completion_tokens": 0 if cache_hit or usage is None else usage.completion_tokens,
+        "cached_tokens": 0 if cache_hit or details is None else (getattr(details, "cached_tokens", None) or 0),
+        "retries": retries,
+        "cache_hit": cache_hit
+    })
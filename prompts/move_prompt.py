@@ -1,66 +1,103 @@
-from openai import OpenAI
-from dotenv import load_dotenv, find_dotenv
 from icecream import ic
+import asyncio
+import copy
 import json
-from .utils import load_prompt
+from .prompt_assembly import assemble_messages
+from .llm_client import chat_completion, chat_completion_async, chat_completion_stream_async
+from .stream_parser import StreamingArgumentsParser
+from .llm_scheduler import PRIORITY_MOVE
 
-def move_prompt(battle_state, model, mode=None):
-    
-    system_message = load_prompt("move_gen_system.txt")
-
-    if mode == "memory":
-        user_message = load_prompt("memory_move_gen.txt")
-    elif mode == "opposition":
-        user_message = load_prompt("opposition_move_prompt.txt")
-        system_message = load_prompt("opposition_system.txt")
-    else:
-        user_message = load_prompt("move_gen_user_3shot.txt")
-
-    user_message = user_message.format(battle_state=battle_state)
-
-    prompt = {
-        "system": system_message,
-        "human": user_message,
-        "function_schema": {
-            "name": "select_move",
-            "description": "Select a move or switch action in Pokemon Showdown battle",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "Thought": {
-                        "type": "string",
-                        "description": "Strategic reasoning behind the selected action"
-                    },
-                    "action_type": {
-                        "type": "string",
-                        "enum": ["move", "switch"],
-                        "description": "Type of action to take: 'move' for using a move, 'switch' for switching Pokemon"
-                    },
-                    "action_name": {
-                        "type": "string",
-                        "description": "Name of the move to use or Pokemon to switch to, in lowercase",
-                        "pattern": "^[a-z]+$"
-                    }
-                },
-                "required": ["Thought", "action_type", "action_name"]
+# System prompt and user template for each move prompt mode
+MOVE_PROMPTS = {
+    None: ("move_gen_system.txt", "move_gen_user_3Shot.txt"),
+    "memory": ("move_gen_system.txt", "memory_move_gen.txt"),
+    "opposition": ("opposition_system.txt", "opposition_move_prompt.txt")
+}
+
+SELECT_MOVE_SCHEMA = {
+    "name": "select_move",
+    "description": "Select a move or switch action in Pokemon Showdown battle",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "Thought": {
+                "type": "string",
+                "description": "Strategic reasoning behind the selected action"
+            },
+            "action_type": {
+                "type": "string",
+                "enum": ["move", "switch"],
+                "description": "Type of action to take: 'move' for using a move, 'switch' for switching Pokemon"
+            },
+            "action_name": {
+                "type": "string",
+                "description": "Name of the move to use or Pokemon to switch to, in lowercase",
+                "pattern": "^[a-z]+$"
+            }
+        },
+        "required": ["Thought", "action_type", "action_name"]
+    }
+}
+
+# Same function with the action fields first. Models emit arguments in schema
+# order, so a streamed response commits to an action before the reasoning.
+SELECT_MOVE_ACTION_FIRST_SCHEMA = {
+    "name": "select_move",
+    "description": "Select a move or switch action in Pokemon Showdown battle, then explain it",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "action_type": SELECT_MOVE_SCHEMA["parameters"]["properties"]["action_type"],
+            "action_name": SELECT_MOVE_SCHEMA["parameters"]["properties"]["action_name"],
+            "Thought": {
+                "type": "string",
+                "description": "Strategic reasoning behind the selected action, written after choosing it"
             }
-        }
+        },
+        "required": ["action_type", "action_name", "Thought"]
     }
+}
+
+def build_select_move_schema(legal_actions=None, action_first=False):
+    """
+    Build the select_move function schema, constrained to this turn's legal
+    actions when they are given.
+
+    Note: the function schema is part of the prompt prefix the provider caches,
+    so a per-turn enum gives up prompt caching of the system prompt and
+    few-shot examples in exchange for fewer unusable actions.
+
+    Args:
+        legal_actions (dict): {"move": [...], "switch": [...]} from legal_actions()
+        action_first (bool): Put the action fields before the Thought
+    """
+    schema = copy.deepcopy(SELECT_MOVE_ACTION_FIRST_SCHEMA if action_first else SELECT_MOVE_SCHEMA)
+    if legal_actions:
+        properties = schema["parameters"]["properties"]
+        action_types = [action_type for action_type in ("move", "switch") if legal_actions[action_type]]
+        if action_types:
+            properties["action_type"]["enum"] = action_types
+        names = list(dict.fromkeys(legal_actions["move"] + legal_actions["switch"]))
+        if names:
+            properties["action_name"].pop("pattern", None)
+            properties["action_name"]["enum"] = names
+    return schema
+
+def build_move_request(battle_state, model, mode=None, action_first=False, legal_actions=None):
+    """Build the chat.completions.create arguments for a select_move call."""
+    system_file, user_file = MOVE_PROMPTS.get(mode, MOVE_PROMPTS[None])
 
-    load_dotenv(find_dotenv())
-    client = OpenAI()
-    response = client.chat.completions.create(
+    # Static system prompt and few-shot examples first, battle state last
+    return dict(
         model=model,
-        messages=[
-            {"role": "system", "content": prompt["system"]},
-            {"role": "user", "content": prompt["human"]}
-        ],
-        functions=[prompt["function_schema"]],
+        messages=assemble_messages(system_file, user_file, "battle_state", battle_state),
+        functions=[build_select_move_schema(legal_actions, action_first)],
         function_call={"name": "select_move"},
         temperature=1
     )
 
-
+def parse_move_response(response):
+    """Extract (Thought, action_type, action_name) from a select_move response."""
     # Extract the function call arguments from the response
     function_args = json.loads(response.choices[0].message.function_call.arguments)
     
@@ -80,6 +117,63 @@ def move_prompt(battle_state, model, mode=None):
         function_args["action_name"]
     )
 
+# Move decisions are sampled at temperature 1 and skip the response cache by
+# default, so a repeated state gets a fresh decision rather than a replay
+def move_prompt(battle_state, model, mode=None, use_cache=False, legal_actions=None):
+    response = chat_completion(build_move_request(battle_state, model, mode, legal_actions=legal_actions), use_cache=use_cache, priority=PRIORITY_MOVE)
+    return parse_move_response(response)
+
+async def move_prompt_async(battle_state, model, mode=None, use_cache=False, legal_actions=None):
+    """Awaitable version of move_prompt() for use inside the battle event loop."""
+    response = await chat_completion_async(build_move_request(battle_state, model, mode, legal_actions=legal_actions), use_cache=use_cache, priority=PRIORITY_MOVE)
+    return parse_move_response(response)
+
+async def move_prompt_stream_async(battle_state, model, mode=None, legal_actions=None):
+    """
+    Stream a select_move call with the action-first schema and return as soon
+    as the action has been parsed, while the Thought keeps streaming.
+
+    Returns:
+        tuple: (action_type, action_name, thought_task) where thought_task is an
+            asyncio.Task resolving to the Thought (None if it could not be parsed)
+    """
+    request = build_move_request(battle_state, model, mode, action_first=True, legal_actions=legal_actions)
+    action = asyncio.get_running_loop().create_future()
+
+    def set_action(fields):
+        if not action.done():
+            action.set_result((fields.get("action_type"), fields.get("action_name")))
+
+    async def consume():
+        parser = StreamingArgumentsParser()
+        chunks = []
+        try:
+            async for text in chat_completion_stream_async(request, priority=PRIORITY_MOVE):
+                chunks.append(text)
+                if not action.done():
+                    fields = parser.feed(text)
+                    if "action_type" in fields and "action_name" in fields:
+                        set_action(fields)
+            function_args = json.loads("".join(chunks))
+        except Exception as e:
+            if not action.done():
+                action.set_exception(e)
+            else:
+                ic(f"Error finishing streamed thought: {e}")
+            return None
+
+        # The model ignored the field order, take the action from the full arguments
+        set_action(function_args)
+        return function_args.get("Thought")
+
+    thought_task = asyncio.create_task(consume())
+    try:
+        action_type, action_name = await action
+    except BaseException:
+        thought_task.cancel()
+        raise
+    return action_type, action_name, thought_task
+
 def test_move_prompt():
     battle_state = '''Turn 1 (Last turn):'
              'Cyclizar was switched in at full HP. Carbink used Iron Defense on itself, '
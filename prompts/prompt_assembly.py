@@ -0,0 +1,49 @@
+from functools import lru_cache
+from .utils import load_prompt
+
+# Providers cache the longest previously seen prompt prefix, so every request
+# is assembled as: system prompt, static template text (instructions and
+# few-shot examples), then the per-turn text. The static parts are rendered
+# once per process and reused as the same string objects every turn.
+
+@lru_cache(maxsize=None)
+def load_template_parts(filename, field):
+    """
+    Split a prompt template around its single dynamic field.
+
+    Args:
+        filename (str): Template file in the prompts directory
+        field (str): Name of the placeholder, e.g. 'battle_state'
+
+    Returns:
+        tuple: (static prefix, static suffix) with escaped braces already resolved
+    """
+    template = load_prompt(filename)
+    placeholder = "{" + field + "}"
+    if template.count(placeholder) != 1:
+        raise ValueError(f"{filename} must contain {placeholder} exactly once")
+    prefix, suffix = template.split(placeholder)
+    # The templates are str.format templates, so literal braces are doubled
+    return prefix.format(), suffix.format()
+
+def assemble_messages(system_file, user_file, field, value):
+    """
+    Build chat messages with all static text ahead of the dynamic value.
+
+    The only text after the value is the template's closing delimiter, so the
+    cacheable prefix covers the system prompt and the whole few-shot block.
+
+    Args:
+        system_file (str): System prompt file
+        user_file (str): User prompt template containing {field}
+        field (str): Name of the dynamic placeholder
+        value (str): Per-call text inserted at the placeholder
+
+    Returns:
+        list: Messages for chat.completions.create
+    """
+    prefix, suffix = load_template_parts(user_file, field)
+    return [
+        {"role": "system", "content": load_prompt(system_file)},
+        {"role": "user", "content": prefix + value + suffix}
+    ]
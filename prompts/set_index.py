@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+from pathlib import Path
+import numpy as np
+
+# Index of what opponents revealed in past battles: for each species, in how
+# many battles it appeared and how often each move, ability and item was
+# seen. Counts live in a .npy file that is memory-mapped on load, and the
+# species and feature names in a JSON vocabulary next to it. Built offline
+# from the battle logs with build_set_index.py.
+
+DEFAULT_INDEX_PATH = "opponent_sets"
+FEATURE_KINDS = ("move", "ability", "item")
+# Features seen in fewer battles than this share are left out of likely sets
+MIN_SHARE = 0.1
+
+def _index_files(path):
+    path = Path(path)
+    return path.with_suffix(".npy"), path.with_suffix(".json")
+
+def write_set_index(battles, counts, path=DEFAULT_INDEX_PATH):
+    """
+    Write an index built from battle logs.
+
+    Args:
+        battles (dict): {species: battles it appeared in}
+        counts (dict): {species: {(kind, name): battles it was revealed in}}
+        path (str): Index path without suffix; '.npy' and '.json' are written
+    """
+    species = sorted(battles)
+    features = sorted({feature for species_counts in counts.values() for feature in species_counts})
+    feature_index = {feature: i for i, feature in enumerate(features)}
+
+    matrix = np.zeros((len(species), len(features)), dtype=np.uint32)
+    for row, name in enumerate(species):
+        for feature, count in counts.get(name, {}).items():
+            matrix[row, feature_index[feature]] = count
+
+    npy_path, json_path = _index_files(path)
+    np.save(npy_path, matrix)
+    with open(json_path, "w") as f:
+        json.dump({
+            "species": species,
+            "battles": [battles[name] for name in species],
+            "features": [f"{kind}:{name}" for kind, name in features]
+        }, f)
+
+class SetIndex:
+    def __init__(self, counts, vocabulary):
+        """
+        Args:
+            counts (np.ndarray): (species, features) battle counts
+            vocabulary (dict): 'species', 'battles' and 'features' lists, see write_set_index()
+        """
+        self.counts = counts
+        self.species = {name: row for row, name in enumerate(vocabulary["species"])}
+        self.battles = vocabulary["battles"]
+        self.features = [feature.split(":", 1) for feature in vocabulary["features"]]
+        # Column indices of each feature kind, so a lookup only touches one row
+        self.columns = {
+            kind: np.array([i for i, (feature_kind, _) in enumerate(self.features) if feature_kind == kind], dtype=np.intp)
+            for kind in FEATURE_KINDS
+        }
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        """Load an index, memory-mapping its counts. Returns None if it has not been built."""
+        npy_path, json_path = _index_files(path)
+        if not npy_path.exists() or not json_path.exists():
+            return None
+        with open(json_path) as f:
+            vocabulary = json.load(f)
+        return cls(np.load(npy_path, mmap_mode="r"), vocabulary)
+
+    def likely_set(self, species, top=4, min_share=MIN_SHARE):
+        """
+        The moves, abilities and items most often revealed by a species.
+
+        Args:
+            species (str): poke_env species id, e.g. 'garchomp'
+            top (int): Most features kept per kind
+            min_share (float): Smallest share of battles a feature must appear in
+
+        Returns:
+            dict | None: {'battles': n, 'move': [(name, share)], 'ability': [...], 'item': [...]},
+                None if the species has never been seen
+        """
+        row = self.species.get(species)
+        if row is None or not self.battles[row]:
+            return None
+        battles = self.battles[row]
+        likely = {"battles": battles}
+        for kind, columns in self.columns.items():
+            counts = np.asarray(self.counts[row, columns])
+            order = np.argsort(-counts, kind="stable")[:top]
+            likely[kind] = [
+                (self.features[columns[i]][1], float(counts[i] / battles))
+                for i in order if counts[i] / battles >= min_share
+            ]
+        return likely
+
+_set_index = None
+_set_index_loaded = False
+_set_index_lock = threading.Lock()
+
+def configure_set_index(path=None):
+    """
+    Load the shared index from `path`. Without a path, the index is loaded
+    on next use from the SET_INDEX_PATH environment variable or DEFAULT_INDEX_PATH.
+    """
+    global _set_index, _set_index_loaded
+    with _set_index_lock:
+        _set_index = SetIndex.load(path) if path is not None else None
+        _set_index_loaded = path is not None
+
+def get_set_index():
+    """
+    Get the process-wide set index, loading it on first use.
+
+    Returns:
+        SetIndex: The shared index, or None if it has not been built
+    """
+    global _set_index, _set_index_loaded
+    if not _set_index_loaded:
+        with _set_index_lock:
+            if not _set_index_loaded:
+                _set_index = SetIndex.load(os.getenv("SET_INDEX_PATH", DEFAULT_INDEX_PATH))
+                _set_index_loaded = True
+    return _set_index
@@ -0,0 +1,251 @@
+from functools import lru_cache
+from .utils import load_prompt, estimate_stats
+from . import type_effectiveness
+from .type_effectiveness import typing_key
+from .battle_context import get_battle_context
+from .damage_calc import get_turn_damage, render_damage
+from .set_index import get_set_index
+
+# Section-based battle state renderer shared by the state generators. A state
+# is a list of sections rendered in order; each generator picks its sections.
+# Pokemon blocks are cached on the battle's context and only re-rendered when
+# something they depend on (HP, status, boosts, revealed ability or moves)
+# changes, so most of a turn's state is reused from the turn before.
+
+DEFAULT_SECTIONS = ("header", "history", "current_turn", "opponent", "likely_sets", "analysis", "self", "switches", "damage")
+MEMORY_SECTIONS = ("header", "history", "thoughts", "current_turn", "opponent", "likely_sets", "analysis", "self", "switches", "damage")
+
+def _type_names(pokemon):
+    return pokemon.type_1.name, pokemon.type_2.name if pokemon.type_2 else None
+
+def _hp_text(pokemon):
+    return f"{pokemon.current_hp_fraction * 100:.0f}%"
+
+def _stats_text(stats):
+    return f"Attack - {stats['atk']}, Defense - {stats['def']}, Special Attack - {stats['spa']}, Special Defense - {stats['spd']}, Speed - {stats['spe']}"
+
+def _signature(pokemon):
+    """Everything a Pokemon's rendered block depends on."""
+    return (
+        pokemon.species,
+        _hp_text(pokemon),
+        pokemon.status,
+        pokemon.ability,
+        _type_names(pokemon),
+        pokemon.level,
+        tuple(sorted(pokemon.boosts.items())),
+        tuple(sorted((pokemon.stats or {}).items(), key=lambda item: item[0])),
+        tuple(pokemon.moves)
+    )
+
+def _cached_block(context, kind, pokemon, render):
+    """Return the cached block for a Pokemon, re-rendering it if its signature changed."""
+    key = (kind, pokemon.species)
+    signature = _signature(pokemon)
+    cached = context.render_cache.get(key)
+    if cached is None or cached[0] != signature:
+        cached = (signature, render(pokemon))
+        context.render_cache[key] = cached
+    return cached[1]
+
+@lru_cache(maxsize=None)
+def _type_analysis(species, type_1, type_2):
+    """Defensive and offensive type analysis of an opponent, as rendered text."""
+    defensive = type_effectiveness.DEFENSIVE_TEXT[typing_key(type_1, type_2)]
+    def_prompt = load_prompt("defensive_type_effectiveness.txt").format(
+        Species=species,
+        Type1=type_1,
+        Type2=type_2,
+        m4x=defensive['4x'],
+        m2x=defensive['2x'],
+        m1x=defensive['1x'],
+        m0_5x=defensive['0.5x'],
+        m0_25x=defensive['0.25x'],
+        m0x=defensive['0x'],
+    )
+    offensive_1 = type_effectiveness.OFFENSIVE_TEXT[type_1]
+    if type_2:
+        offensive_2 = type_effectiveness.OFFENSIVE_TEXT[type_2]
+        off_prompt = load_prompt("offensive_two_type_effectiveness.txt").format(
+            Species=species,
+            Type1=type_1,
+            Type2=type_2,
+            supereffective1=offensive_1['2x'],
+            resisted1=offensive_1['0.5x'],
+            immune1=offensive_1['0x'],
+            supereffective2=offensive_2['2x'],
+            resisted2=offensive_2['0.5x'],
+            immune2=offensive_2['0x'],
+        )
+    else:
+        off_prompt = load_prompt("offensive_one_type_effectiveness.txt").format(
+            Species=species,
+            Type=type_1,
+            supereffective=offensive_1['2x'],
+            resisted=offensive_1['0.5x'],
+            immune=offensive_1['0x'],
+        )
+    return ("[DEFENSIVE ANALYSIS]", def_prompt, "", "[OFFENSIVE ANALYSIS]", off_prompt, "")
+
+def _render_opponent_active(pokemon):
+    type_1, type_2 = _type_names(pokemon)
+    lines = [
+        f"ACTIVE POKEMON: {pokemon.species}",
+        f"HP: {_hp_text(pokemon)}",
+        f"Status: {pokemon.status}",
+        f"Ability: {pokemon.ability if pokemon.ability else 'Unknown'}",
+        f"Type: {type_1}/{type_2 or 'None'}\n"
+    ]
+    stats = estimate_stats(pokemon)
+    if stats:
+        lines.append(f"Estimated Stats: Attack - {stats['attack']}, Defense - {stats['defense']}, Special Attack - {stats['special-attack']}, Special Defense - {stats['special-defense']}, Speed - {stats['speed_low']} to {stats['speed_high']}\n")
+    return tuple(lines)
+
+def _render_active(pokemon):
+    type_1, type_2 = _type_names(pokemon)
+    lines = [
+        f"ACTIVE POKEMON: {pokemon.species}",
+        f"HP: {_hp_text(pokemon)}",
+        f"Status: {pokemon.status}",
+        f"Ability: {pokemon.ability}",
+        f"Type: {type_1}/{type_2 or 'None'}\n",
+        f"Stats: {_stats_text(pokemon.stats)}\n",
+        "AVAILABLE MOVES:"
+    ]
+    for move_id, move in pokemon.moves.items():
+        lines.append(
+            f"- {move_id}: {move.type.name} | "
+            f"Power: {move.base_power} | "
+            f"Category: {move.category.name} | "
+            f"Priority: {move.priority} | "
+            f"Effect: {move.secondary}"
+        )
+    lines.append("")
+    return tuple(lines)
+
+def _render_switch(pokemon):
+    type_1, type_2 = _type_names(pokemon)
+    lines = [
+        f"- {pokemon.species} ({_hp_text(pokemon)} HP) | "
+        f"Status: {pokemon.status} | "
+        f"Ability: {pokemon.ability} | "
+        f"Type: {type_1}/{type_2 or 'None'} | "
+        f"Stats: {_stats_text(pokemon.stats)}",
+        "  Moves:"
+    ]
+    for move_id, move in pokemon.moves.items():
+        lines.append(
+            f"  * {move_id}: {move.type.name} | "
+            f"Power: {move.base_power} | "
+            f"Category: {move.category.name}"
+        )
+    lines.append("")
+    return tuple(lines)
+
+def _header(battle, context, current_turn, last_turn, thought):
+    return [f"BATTLE STATE - TURN {current_turn + 1}", "============================\n"]
+
+def _history(battle, context, current_turn, last_turn, thought):
+    lines = []
+    previous_turn = context.record_turn(current_turn, last_turn)
+    if previous_turn and current_turn > 0:
+        lines += [f"PREVIOUS TURN ({current_turn - 1}):", previous_turn, ""]
+    lines += [f"LAST TURN ({current_turn}):", last_turn, ""]
+    return lines
+
+def _thoughts(battle, context, current_turn, last_turn, thought):
+    lines = []
+    previous_thought = context.record_thought(current_turn, thought)
+    if previous_thought and current_turn > 0:
+        lines += [f"PREVIOUS THOUGHTS ({current_turn - 1}):", previous_thought, ""]
+    if thought:
+        lines += [f"LAST THOUGHTS ({current_turn}):", thought, ""]
+    return lines
+
+def _current_turn(battle, context, current_turn, last_turn, thought):
+    return [f"Turn {current_turn + 1} (Current turn):"]
+
+def _opponent(battle, context, current_turn, last_turn, thought):
+    fainted = len([pokemon for pokemon in battle.opponent_team.values() if pokemon.fainted])
+    lines = ["OPPONENT STATUS", "--------------", f"Remaining Pokemon: {6 - fainted}/6\n"]
+    lines += _cached_block(context, "opponent_active", battle.opponent_active_pokemon, _render_opponent_active)
+    return lines
+
+def _likely_set_text(species, likely):
+    parts = []
+    for kind, label in (("move", "Moves"), ("ability", "Abilities"), ("item", "Items")):
+        if likely[kind]:
+            parts.append(f"{label} - " + ", ".join(f"{name} {share * 100:.0f}%" for name, share in likely[kind]))
+    return f"- {species} ({likely['battles']} battles): {'; '.join(parts)}" if parts else None
+
+def _likely_sets(battle, context, current_turn, last_turn, thought):
+    index = get_set_index()
+    if index is None:
+        return []
+    # The active Pokemon first, then the rest of the revealed team
+    opponents = sorted(
+        (pokemon for pokemon in battle.opponent_team.values() if not pokemon.fainted),
+        key=lambda pokemon: not pokemon.active
+    )
+    lines = []
+    for pokemon in opponents:
+        likely = index.likely_set(pokemon.species)
+        text = _likely_set_text(pokemon.species, likely) if likely else None
+        if text:
+            lines.append(text)
+    if not lines:
+        return []
+    return ["LIKELY SETS (share of past battles each was revealed in)"] + lines + [""]
+
+def _analysis(battle, context, current_turn, last_turn, thought):
+    opponent = battle.opponent_active_pokemon
+    return list(_type_analysis(opponent.species, *_type_names(opponent)))
+
+def _self(battle, context, current_turn, last_turn, thought):
+    return ["YOUR STATUS", "----------"] + list(_cached_block(context, "active", battle.active_pokemon, _render_active))
+
+def _switches(battle, context, current_turn, last_turn, thought):
+    if not battle.available_switches:
+        return ["AVAILABLE SWITCHES: None\n"]
+    lines = ["AVAILABLE SWITCHES:"]
+    for pokemon in battle.available_switches:
+        lines += _cached_block(context, "switch", pokemon, _render_switch)
+    return lines
+
+def _damage(battle, context, current_turn, last_turn, thought):
+    return render_damage(get_turn_damage(battle, context))
+
+SECTIONS = {
+    "header": _header,
+    "history": _history,
+    "thoughts": _thoughts,
+    "current_turn": _current_turn,
+    "opponent": _opponent,
+    "likely_sets": _likely_sets,
+    "analysis": _analysis,
+    "self": _self,
+    "switches": _switches,
+    "damage": _damage
+}
+
+def render_battle_state(battle, last_turn, context=None, sections=DEFAULT_SECTIONS, thought=None):
+    """
+    Render the battle state passed to the move prompt.
+
+    Args:
+        battle: poke_env battle
+        last_turn (str): Summary of the most recent turn's events
+        context (BattleContext): This battle's memory, defaults to the shared
+            store's context for battle.battle_tag
+        sections (tuple): Names from SECTIONS, rendered in order
+        thought (str): Thought behind the last decision, for the 'thoughts' section
+
+    Returns:
+        str: The battle state
+    """
+    context = context or get_battle_context(battle)
+    current_turn = max(battle.observations.keys())
+    lines = []
+    for section in sections:
+        lines += SECTIONS[section](battle, context, current_turn, last_turn, thought)
+    return "\n".join(lines)
@@ -0,0 +1,63 @@
+import json
+
+# Incremental parser for streamed function-call arguments. The model emits a
+# flat JSON object a few characters at a time; each field is reported as soon
+# as its value is complete, without waiting for the closing brace.
+
+class StreamingArgumentsParser:
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.fields = {}
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, text):
+        """
+        Add streamed text and parse any newly completed fields.
+
+        Args:
+            text (str): The next chunk of the arguments string
+
+        Returns:
+            dict: Every field completed so far
+        """
+        self.buffer += text
+        self._parse()
+        return self.fields
+
+    def _skip_whitespace(self, index):
+        while index < len(self.buffer) and self.buffer[index].isspace():
+            index += 1
+        return index
+
+    def _parse(self):
+        while True:
+            index = self._skip_whitespace(self.position)
+            if index < len(self.buffer) and self.buffer[index] in "{,":
+                index = self._skip_whitespace(index + 1)
+            if index >= len(self.buffer) or self.buffer[index] == "}":
+                return
+
+            # An incomplete key or value fails to decode; wait for more text.
+            # Malformed output is left for the final json.loads to report.
+            try:
+                key, index = self._decoder.raw_decode(self.buffer, index)
+            except json.JSONDecodeError:
+                return
+            index = self._skip_whitespace(index)
+            if index >= len(self.buffer) or self.buffer[index] != ":":
+                return
+            index = self._skip_whitespace(index + 1)
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, index)
+            except json.JSONDecodeError:
+                return
+
+            # Numbers and literals are only complete once a delimiter follows
+            if not isinstance(value, (str, list, dict)):
+                delimiter = self._skip_whitespace(end)
+                if delimiter >= len(self.buffer) or self.buffer[delimiter] not in ",}":
+                    return
+
+            self.fields[key] = value
+            self.position = end
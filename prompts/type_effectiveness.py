@@ -1,101 +1,179 @@
-import pandas as pd
+import csv
+from functools import lru_cache
+from itertools import combinations
+from pathlib import Path
+from types import MappingProxyType
 import numpy as np
 from icecream import ic
 
-# Load type data from CSV
-type_chart = pd.read_csv('./prompts/type_chart.csv')
-
-def defensive_type_matchup(types):
-    type_1 = types[0]
-    type_2 = types[1]
-
-    matchup = {
-        '4x' : [],
-        '2x' : [],
-        '1x' : [],
-        '0.5x' : [],
-        '0.25x' : [],
-        '0x' : []
+# Type chart as an 18x18 array, TYPE_CHART[attacking, defending]. Every
+# single- and dual-type matchup (18 + 153 = 171 typings) is precomputed into
+# read-only tables, so lookups during state generation are dict accesses.
+# The chart is read and the tables built on first use rather than at import.
+
+TYPE_CHART_PATH = Path(__file__).parent / "type_chart.csv"
+
+DEFENSIVE_CATEGORIES = {4: '4x', 2: '2x', 1: '1x', 0.5: '0.5x', 0.25: '0.25x', 0: '0x'}
+OFFENSIVE_CATEGORIES = {2: '2x', 1: '1x', 0.5: '0.5x', 0: '0x'}
+
+def _load_type_chart(path=TYPE_CHART_PATH):
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    types = tuple(name.upper() for name in rows[0][1:])
+    chart = np.array([[float(value) for value in row[1:]] for row in rows[1:]])
+    chart.setflags(write=False)
+    return types, chart
+
+def _categorize(types, multipliers, categories):
+    matchup = {category: [] for category in categories.values()}
+    for name, multiplier in zip(types, multipliers):
+        category = categories.get(float(multiplier))
+        if category is not None:
+            matchup[category].append(name)
+    return MappingProxyType({category: tuple(names) for category, names in matchup.items()})
+
+def _render(matchup):
+    return MappingProxyType({category: ", ".join(names) if names else "NONE" for category, names in matchup.items()})
+
+@lru_cache(maxsize=None)
+def _tables():
+    """Load the chart and build every lookup table, once per process."""
+    types, chart = _load_type_chart()
+    index = MappingProxyType({name: i for i, name in enumerate(types)})
+
+    def defending_multipliers(type_1, type_2=None):
+        multipliers = chart[:, index[type_1]]
+        if type_2:
+            multipliers = multipliers * chart[:, index[type_2]]
+        return multipliers
+
+    typings = [(name, None) for name in types] + list(combinations(sorted(types), 2))
+    # Attacking types grouped by effectiveness against each typing
+    defensive = MappingProxyType({
+        typing: _categorize(types, defending_multipliers(*typing), DEFENSIVE_CATEGORIES) for typing in typings
+    })
+    # Defending types grouped by effectiveness of each attacking type
+    offensive = MappingProxyType({
+        name: _categorize(types, chart[index[name]], OFFENSIVE_CATEGORIES) for name in types
+    })
+    return {
+        "TYPES": types,
+        "TYPE_CHART": chart,
+        "TYPE_INDEX": index,
+        "DEFENSIVE_MATCHUPS": defensive,
+        "OFFENSIVE_MATCHUPS": offensive,
+        # The same tables as prompt-ready strings, 'A, B' or 'NONE'
+        "DEFENSIVE_TEXT": MappingProxyType({typing: _render(matchup) for typing, matchup in defensive.items()}),
+        "OFFENSIVE_TEXT": MappingProxyType({name: _render(matchup) for name, matchup in offensive.items()})
     }
 
-    # Get type 1 column
-    t1_m = type_chart.loc[:,type_1.title()].to_list()
+_TABLE_NAMES = {"TYPES", "TYPE_CHART", "TYPE_INDEX", "DEFENSIVE_MATCHUPS", "OFFENSIVE_MATCHUPS", "DEFENSIVE_TEXT", "OFFENSIVE_TEXT"}
 
-    # Get type 2 column
-    if type_2:
-        t2_m = type_chart.loc[:,type_2.title()].to_list()
-    else:
-        t2_m = np.ones(len(t1_m))
-    
-    # Calculate the matchup
-    m = [a * b for a, b in zip(t1_m, t2_m)]
-
-    # Categorize the matchup
-    for i in range(len(m)):
-        if m[i] == 4:
-            matchup['4x'].append(type_chart.iloc[i,0].upper())
-        elif m[i] == 2:
-            matchup['2x'].append(type_chart.iloc[i,0].upper())
-        elif m[i] == 1:
-            matchup['1x'].append(type_chart.iloc[i,0].upper())
-        elif m[i] == 0.5:
-            matchup['0.5x'].append(type_chart.iloc[i,0].upper())
-        elif m[i] == 0.25:
-            matchup['0.25x'].append(type_chart.iloc[i,0].upper())
-        elif m[i] == 0:
-            matchup['0x'].append(type_chart.iloc[i,0].upper())
-
-    return matchup
+def __getattr__(name):
+    # The tables above are module attributes built on first access (PEP 562)
+    if name in _TABLE_NAMES:
+        return _tables()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def offensive_type_matchup(types):
-    type_1 = types[0]
-    type_2 = types[1]
-
-    t1_matchup = {
-        '2x' : [],
-        '1x' : [],
-        '0.5x' : [],
-        '0x' : []
-    }
+def _type_index(type_name):
+    """Index of a type given as 'FIRE', 'Fire' or a poke_env PokemonType."""
+    return _tables()["TYPE_INDEX"][getattr(type_name, "name", type_name).upper()]
 
-    t2_matchup = {
-        '2x' : [],
-        '1x' : [],
-        '0.5x' : [],
-        '0x' : []
-    }
+def typing_key(type_1, type_2=None):
+    """Canonical (type_1, type_2) key; type_2 is None for single types."""
+    types = _tables()["TYPES"]
+    type_1 = types[_type_index(type_1)]
+    type_2 = types[_type_index(type_2)] if type_2 else None
+    if type_2 == type_1:
+        type_2 = None
+    return (type_1, type_2) if type_2 is None or type_1 < type_2 else (type_2, type_1)
 
-    # Get type 1 matchups
-    t1_m = type_chart.loc[type_chart['Attacking']==type_1.title(), :]
-    t1_m = t1_m.iloc[0,1:].to_list()
-    for i in range(len(t1_m)):
-        if t1_m[i] == 2:
-            t1_matchup['2x'].append(type_chart.iloc[i,0].upper())
-        elif t1_m[i] == 1:
-            t1_matchup['1x'].append(type_chart.iloc[i,0].upper())
-        elif t1_m[i] == 0.5:
-            t1_matchup['0.5x'].append(type_chart.iloc[i,0].upper())
-        elif t1_m[i] == 0:
-            t1_matchup['0x'].append(type_chart.iloc[i,0].upper())
-
-    # Get type 2 matchups
-    if type_2:
-        t2_m = type_chart.loc[type_chart['Attacking']==type_2.title(), :]
-        t2_m = t2_m.iloc[0,1:].to_list()
-        for i in range(len(t2_m)):
-            if t2_m[i] == 2:
-                t2_matchup['2x'].append(type_chart.iloc[i,0].upper())
-            elif t2_m[i] == 1:
-                t2_matchup['1x'].append(type_chart.iloc[i,0].upper())
-            elif t2_m[i] == 0.5:
-                t2_matchup['0.5x'].append(type_chart.iloc[i,0].upper())
-            elif t2_m[i] == 0:
-                t2_matchup['0x'].append(type_chart.iloc[i,0].upper())
-    else:
-        t2_matchup = None
+def defensive_type_matchup(types):
+    """
+    Attacking types grouped by effectiveness against a Pokemon.
+
+    Args:
+        types (list): [type_1, type_2], type_2 may be None
 
+    Returns:
+        Mapping: {'4x': (...), '2x': (...), '1x': (...), '0.5x': (...), '0.25x': (...), '0x': (...)}
+    """
+    return _tables()["DEFENSIVE_MATCHUPS"][typing_key(types[0], types[1])]
+
+def offensive_type_matchup(types):
+    """
+    Defending types grouped by effectiveness of each of a Pokemon's types.
+
+    Args:
+        types (list): [type_1, type_2], type_2 may be None
+
+    Returns:
+        tuple: (type_1 matchup, type_2 matchup or None), each
+            {'2x': (...), '1x': (...), '0.5x': (...), '0x': (...)}
+    """
+    type_1, type_2 = types[0], types[1]
+    tables = _tables()
+    t1_matchup = tables["OFFENSIVE_MATCHUPS"][tables["TYPES"][_type_index(type_1)]]
+    t2_matchup = tables["OFFENSIVE_MATCHUPS"][tables["TYPES"][_type_index(type_2)]] if type_2 else None
     return t1_matchup, t2_matchup
 
+def type_multiplier(attacking_type, type_1, type_2=None):
+    """Effectiveness of one attacking type against one typing."""
+    chart = _tables()["TYPE_CHART"]
+    multiplier = chart[_type_index(attacking_type), _type_index(type_1)]
+    if type_2:
+        multiplier *= chart[_type_index(attacking_type), _type_index(type_2)]
+    return float(multiplier)
+
+def type_multipliers(attacking_types, defending_typings):
+    """
+    Effectiveness of many attacking types against many typings in one call.
+
+    Args:
+        attacking_types (list): N attacking types
+        defending_typings (list): M (type_1, type_2) pairs, type_2 may be None
+
+    Returns:
+        np.ndarray: (N, M) array of damage multipliers
+    """
+    attackers = np.array([_type_index(name) for name in attacking_types], dtype=np.intp)
+    first = np.array([_type_index(typing[0]) for typing in defending_typings], dtype=np.intp)
+    second = np.array([_type_index(typing[1]) if typing[1] else -1 for typing in defending_typings], dtype=np.intp)
+
+    rows = _tables()["TYPE_CHART"][attackers]
+    multipliers = rows[:, first]
+    # Single types have no second factor; index -1 is masked out to 1
+    multipliers = multipliers * np.where(second >= 0, rows[:, second], 1.0)
+    return multipliers
+
+def paired_type_multipliers(attacking_types, defending_typings):
+    """
+    Effectiveness of attacking_types[i] against defending_typings[i] for every i.
+    Types outside the chart (e.g. '???') are neutral.
+
+    Args:
+        attacking_types (list): N attacking types
+        defending_typings (list): N (type_1, type_2) pairs, type_2 may be None
+
+    Returns:
+        np.ndarray: (N,) array of damage multipliers
+    """
+    chart = _tables()["TYPE_CHART"]
+    # Index 18 is an extra neutral row and column for unknown types
+    padded = np.pad(chart, ((0, 1), (0, 1)), constant_values=1.0)
+    unknown = len(chart)
+
+    def indices(types):
+        index = _tables()["TYPE_INDEX"]
+        return np.array([
+            index.get(getattr(name, "name", name).upper(), unknown) if name else unknown for name in types
+        ], dtype=np.intp)
+
+    attackers = indices(attacking_types)
+    first = indices([typing[0] for typing in defending_typings])
+    second = indices([typing[1] for typing in defending_typings])
+    return padded[attackers, first] * padded[attackers, second]
+
 def type_test():
     types = ['ROCK', 'GROUND']
     def_matchups = defensive_type_matchup(types)
@@ -104,5 +182,7 @@ def type_test():
     off_matchups = offensive_type_matchup(types)
     ic(off_matchups)
 
+    ic(type_multipliers(['WATER', 'GRASS'], [('ROCK', 'GROUND'), ('FIRE', None)]))
+
 if __name__ == "__main__":
-    type_test()
\ No newline at end of file
+    type_test()
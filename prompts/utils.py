@@ -1,31 +1,15 @@
 from pathlib import Path
-import os
-from dotenv import load_dotenv, find_dotenv
-from openai import OpenAI
+import re
+from functools import lru_cache
+from .event_renderer import render_turn_events
 
+@lru_cache(maxsize=None)
 def load_prompt(filename):
     prompt_path = Path("prompts") / filename
     with open(prompt_path, "r", encoding="utf-8") as f:
         return f.read().strip()
     
-# Use LLM convert last turn into a portion of a prompt
-def get_last_turn_observation(events, model):
-    """
-    Creates a prompt for an LLM to translate Pokemon battle events into natural language.
-    
-    Args:
-        events: List of battle events from the last turn
-        
-    Returns:
-        str: Natural language description of the events
-    """
-    # Initialize the OpenAI client
-    # Get the absolute path to your .env file
-    load_dotenv(find_dotenv())
-    client = OpenAI(
-        api_key=os.getenv("OPENAI_API_KEY")
-    )
-
+def _format_events(events):
     # Convert events list into a more readable format
     formatted_events = []
     unwanted_events = ['init', 'title', 'gametype', 'player', 'teamsize', 'gen', 'tier', 'rule', 'j', 'upkeep']
@@ -33,25 +17,45 @@ def get_last_turn_observation(events, model):
         if event[1] not in unwanted_events:
             formatted_events.append(' '.join(event[1:]))
     
-    events_text = '\n'.join(formatted_events)
-    
+    return '\n'.join(formatted_events)
+
+def _build_summary_request(events_text, model):
     # Create a prompt for the LLM
     system_message = load_prompt("battle_state_gen_system.txt")
     user_message = load_prompt("battle_state_gen_user.txt")
 
     user_message = user_message.format(events_text=events_text)
 
+    return dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ],
+        temperature=1,
+        max_tokens=150
+    )
+
+# Use LLM convert last turn into a portion of a prompt
+def get_last_turn_observation(events, model, use_cache=True):
+    """
+    Creates a prompt for an LLM to translate Pokemon battle events into natural language.
+    
+    Args:
+        events: List of battle events from the last turn
+        use_cache: Whether identical event lists may be served from the response cache
+        
+    Returns:
+        str: Natural language description of the events
+    """
+    # Imported here so the helpers in this module don't pull in openai
+    from .llm_client import chat_completion
+    from .llm_scheduler import PRIORITY_SUMMARY
+    events_text = _format_events(events)
+
     try:
         # Make the API call using the new format
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=1,
-            max_tokens=150
-        )
+        response = chat_completion(_build_summary_request(events_text, model), use_cache=use_cache, priority=PRIORITY_SUMMARY)
         
         # Extract the response text (new format)
         return response.choices[0].message.content.strip()
@@ -60,42 +64,142 @@ def get_last_turn_observation(events, model):
         print(f"Error calling ChatGPT API: {e}")
         return f"Last turn events: {events_text}"
 
-def estimate_stats(pokemon) -> dict[str, int]:
-    if not pokemon or not pokemon.base_stats:
-        return None
-    
-    # Constants for calculation
-    level = pokemon.level
-    iv = 31  # Maximum IVs
-    ev_invested = 252  # Maximum EVs for invested stats
+async def get_last_turn_observation_async(events, model, use_cache=True):
+    """Awaitable version of get_last_turn_observation()."""
+    from .llm_client import chat_completion_async
+    from .llm_scheduler import PRIORITY_SUMMARY
+    events_text = _format_events(events)
+
+    try:
+        response = await chat_completion_async(_build_summary_request(events_text, model), use_cache=use_cache, priority=PRIORITY_SUMMARY)
+        return response.choices[0].message.content.strip()
+
+    except Exception as e:
+        print(f"Error calling ChatGPT API: {e}")
+        return f"Last turn events: {events_text}"
+
+def summarize_last_turn(events, model, summarizer="llm", player_role=None):
+    """
+    Describe the events of the last turn in natural language.
+
+    Args:
+        events: List of battle events from the last turn
+        model: LLM model used when summarizer is "llm"
+        summarizer: "llm" to ask the model, "rules" for the deterministic renderer
+        player_role: 'p1' or 'p2', used by the rule-based renderer
+
+    Returns:
+        str: Natural language description of the events
+    """
+    if summarizer == "rules":
+        return render_turn_events(events, player_role)
+    return get_last_turn_observation(events, model)
+
+async def summarize_last_turn_async(events, model, summarizer="llm", player_role=None):
+    """Awaitable version of summarize_last_turn()."""
+    if summarizer == "rules":
+        return render_turn_events(events, player_role)
+    return await get_last_turn_observation_async(events, model)
+
+def parse_available_actions(battle_state):
+    """
+    Recover the moves and switches listed in a rendered battle state, e.g. one
+    stored in a battle log.
+
+    Args:
+        battle_state (str): Text produced by one of the state generators
+
+    Returns:
+        dict: {"move": [move ids], "switch": [species]}
+    """
+    actions = {"move": [], "switch": []}
+    section = None
+    for line in battle_state.splitlines():
+        if line.startswith("AVAILABLE MOVES:"):
+            section = "move"
+        elif line.startswith("AVAILABLE SWITCHES:"):
+            section = "switch"
+        elif section == "move" and line.startswith("- "):
+            actions["move"].append(line[2:].split(":", 1)[0].strip())
+        elif section == "switch" and line.startswith("- "):
+            actions["switch"].append(re.split(r"[ (]", line[2:], maxsplit=1)[0].strip())
+        elif line and not line.startswith(" ") and not line.startswith("- "):
+            section = None
+    return actions
+
+# Spread assumed for opponent Pokemon, (IVs, EVs in the invested stats)
+DEFAULT_SPREAD = (31, 252)
+# Columns of estimate_team_stats() rows, in estimate_stats() key order
+STAT_COLUMNS = ("attack", "defense", "special-attack", "special-defense", "speed_high", "speed_low")
+STAT_CACHE_SIZE = 1024
+
+@lru_cache(maxsize=STAT_CACHE_SIZE)
+def _estimate_stats(species, level, base_stats, spread):
+    """Estimated stats in STAT_COLUMNS order. base_stats is (atk, def, spa, spd, spe)."""
+    iv, ev_invested = spread
     ev_uninvested = 0  # No EVs for uninvested stats
-    
+
     def calculate_stat(base: int, level: int, iv: int, ev: int, nature: float = 1.0) -> int:
         return (((2 * base + iv + (ev // 4)) * level // 100) + 5) * nature
-    
-    # Get relevant base stats (excluding HP)
+
+    attack, defense, special_attack, special_defense, speed = base_stats
     stats_list = [
-        ("attack", pokemon.base_stats["atk"]),
-        ("defense", pokemon.base_stats["def"]),
-        ("special-attack", pokemon.base_stats["spa"]),
-        ("special-defense", pokemon.base_stats["spd"]),
-        ("speed_high", pokemon.base_stats["spe"]),
-        ("speed_low", pokemon.base_stats["spe"])
+        ("attack", attack),
+        ("defense", defense),
+        ("special-attack", special_attack),
+        ("special-defense", special_defense),
+        ("speed_high", speed),
+        ("speed_low", speed)
     ]
-    
+
     # Sort stats by base value to determine likely EV investment
     sorted_stats = sorted(stats_list, key=lambda x: x[1], reverse=True)
     primary_stat = sorted_stats[0][0]
     # Secondary stat is always speed stat to maximize speed control
     secondary_stat = "speed_high" if sorted_stats[0][0] != "speed_high" else sorted_stats[2][0]
-    
-    # Calculate stats
-    stats = {}
+
+    stats = []
     for stat_name, base_value in stats_list:
         ev = ev_invested if stat_name in (primary_stat, secondary_stat) else ev_uninvested
         nature = 1.0
         if stat_name == "speed_high":
             nature = 1.1 if primary_stat == "speed_high" or primary_stat == "speed_low" else 1.0
-        stats[stat_name] = calculate_stat(base_value, level, iv, ev, nature=nature)
-    
-    return stats
\ No newline at end of file
+        stats.append(calculate_stat(base_value, level, iv, ev, nature=nature))
+    return tuple(stats)
+
+def _stats_key(pokemon, spread):
+    base = pokemon.base_stats
+    return pokemon.species, pokemon.level, (base["atk"], base["def"], base["spa"], base["spd"], base["spe"]), spread
+
+def estimate_stats(pokemon, spread=DEFAULT_SPREAD) -> dict[str, int]:
+    """
+    Estimate an opponent's stats from its base stats, assuming max IVs and
+    EVs in its best stat and speed. Results are cached per (species, level,
+    spread), so repeat calls across turns and battles are lookups.
+
+    Args:
+        pokemon: poke_env Pokemon
+        spread (tuple): (IVs, EVs in the invested stats)
+
+    Returns:
+        dict: Keyed by STAT_COLUMNS, None if the base stats are unknown
+    """
+    if not pokemon or not pokemon.base_stats:
+        return None
+    return dict(zip(STAT_COLUMNS, _estimate_stats(*_stats_key(pokemon, spread))))
+
+def estimate_team_stats(pokemon, spread=DEFAULT_SPREAD):
+    """
+    Batched estimate_stats() for several Pokemon, e.g. every revealed opponent.
+
+    Args:
+        pokemon (list): poke_env Pokemon, those without base stats are skipped
+        spread (tuple): (IVs, EVs in the invested stats)
+
+    Returns:
+        tuple: (the Pokemon estimated, (N, 6) np.ndarray with STAT_COLUMNS columns)
+    """
+    import numpy as np
+    known = [mon for mon in pokemon if mon and mon.base_stats]
+    rows = [_estimate_stats(*_stats_key(mon, spread)) for mon in known]
+    return known, np.array(rows, dtype=float).reshape(len(rows), len(STAT_COLUMNS))
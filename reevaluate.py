@@ -0,0 +1,226 @@
+from pathlib import Path
+import asyncio
+import json
+import argparse
+import csv
+import time
+from datetime import datetime
+from icecream import ic
+from openai.types.chat import ChatCompletion
+from prompts import build_move_request, parse_move_response, parse_available_actions, chat_completion_async, configure_backend, start_turn_telemetry, ActionIndex, normalize_action_name
+from stats import percentile
+
+def get_logged_turns(logs_dir="./logs", start_date=None, end_date=None, player=None):
+    """Streams (turn id, turn) for every LLM-decided turn in the battle logs."""
+    logs_path = Path(logs_dir)
+
+    for log_file in sorted(logs_path.glob("**/battle_log.json")):
+        try:
+            timestamp_str = log_file.parent.name
+            timestamp = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
+
+            if start_date and end_date:
+                start = datetime.strptime(start_date, "%Y%m%d_%H%M%S")
+                end = datetime.strptime(end_date, "%Y%m%d_%H%M%S")
+                if not start <= timestamp <= end:
+                    continue
+
+            with open(log_file, "r") as f:
+                battle_log = json.load(f)
+        except Exception as e:
+            ic(f"Error processing {log_file}: {e}")
+            continue
+
+        if player and battle_log["metadata"].get("player_name") != player:
+            continue
+
+        for index, turn in enumerate(battle_log.get("turns", [])):
+            if turn.get("is_random_move") or turn.get("decision_source", "llm") != "llm":
+                continue
+            if not turn.get("battle_state") or not turn.get("action_name"):
+                continue
+            yield f"{timestamp_str}:{index}", turn
+
+def build_turn_request(turn, model, mode=None):
+    """The select_move request for a logged turn, constrained to its legal actions as with constrain_actions."""
+    return build_move_request(turn["battle_state"], model, mode, legal_actions=parse_available_actions(turn["battle_state"]))
+
+class ApiBackend:
+    """
+    Sends requests through the shared client and scheduler to the configured
+    backend. The response cache is off by default, since cached responses
+    would be scored with the latency and tokens of the original call.
+    """
+    def __init__(self, use_cache=False):
+        self.use_cache = use_cache
+
+    async def complete(self, request):
+        return await chat_completion_async(request, use_cache=self.use_cache)
+
+def evaluate_response(turn_id, turn, response, wall_time, cache_hit=False):
+    """Compare a response with the logged action."""
+    thought, action_type, action_name = parse_move_response(response)
+    # Resolve the name onto a legal action the way live play does, so
+    # 'Close Combat' and 'closecombat' are the same action
+    resolved = ActionIndex(parse_available_actions(turn["battle_state"])).resolve(action_type, action_name)
+    if resolved is not None:
+        action_type, action_name = resolved
+    usage = response.usage
+    details = getattr(usage, "prompt_tokens_details", None) if usage else None
+    return {
+        "turn_id": turn_id,
+        "logged_action_type": turn.get("action_type"),
+        "logged_action_name": turn.get("action_name"),
+        "action_type": action_type,
+        "action_name": action_name,
+        "agrees": normalize_action_name(action_name) == normalize_action_name(turn.get("action_name")),
+        "legal": resolved is not None,
+        "wall_time": round(wall_time, 4),
+        "prompt_tokens": usage.prompt_tokens if usage else 0,
+        "completion_tokens": usage.completion_tokens if usage else 0,
+        "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if details else 0,
+        "cache_hit": cache_hit,
+        "error": None
+    }
+
+async def run_evaluation(turns, backend, model, mode=None, concurrency=8):
+    """Stream logged turns through the backend with at most `concurrency` requests in flight."""
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    results = []
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            turn_id, turn = item
+            # Telemetry shows whether the response came from the local cache
+            calls = start_turn_telemetry()
+            start = time.perf_counter()
+            try:
+                response = await backend.complete(build_turn_request(turn, model, mode))
+                cache_hit = any(call["cache_hit"] for call in calls)
+                results.append(evaluate_response(turn_id, turn, response, time.perf_counter() - start, cache_hit))
+            except Exception as e:
+                results.append({"turn_id": turn_id, "error": str(e)})
+            queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for i in range(concurrency)]
+    for item in turns:
+        await queue.put(item)
+    for i in range(concurrency):
+        await queue.put(None)
+    await asyncio.gather(*workers)
+    return results
+
+def write_batch_file(turns, model, mode, filename):
+    """Write the requests as an OpenAI Batch API input file instead of calling a model."""
+    count = 0
+    with open(filename, "w") as f:
+        for turn_id, turn in turns:
+            f.write(json.dumps({
+                "custom_id": turn_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": build_turn_request(turn, model, mode)
+            }) + "\n")
+            count += 1
+    return count
+
+def score_batch_results(turns, filename):
+    """Score an OpenAI Batch API output file against the logged turns."""
+    responses = {}
+    with open(filename, "r") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry.get("response") and entry["response"].get("body"):
+                responses[entry["custom_id"]] = ChatCompletion.model_validate(entry["response"]["body"])
+
+    results = []
+    for turn_id, turn in turns:
+        if turn_id not in responses:
+            continue
+        try:
+            results.append(evaluate_response(turn_id, turn, responses[turn_id], 0))
+        except Exception as e:
+            results.append({"turn_id": turn_id, "error": str(e)})
+    return results
+
+def summarize(results):
+    scored = [result for result in results if not result.get("error")]
+    # Cache hits count towards agreement but not towards cost
+    live = [result for result in scored if not result.get("cache_hit")]
+    wall_times = [result["wall_time"] for result in live]
+    summary = {
+        "turns": len(results),
+        "errors": len(results) - len(scored),
+        "cache_hits": len(scored) - len(live),
+        "agreement_percentage": sum(result["agrees"] for result in scored) / len(scored) * 100 if scored else 0,
+        "legal_percentage": sum(result["legal"] for result in scored) / len(scored) * 100 if scored else 0,
+        "prompt_tokens": sum(result["prompt_tokens"] for result in live),
+        "cached_tokens": sum(result["cached_tokens"] for result in live),
+        "completion_tokens": sum(result["completion_tokens"] for result in live),
+        "latency_p50": percentile(wall_times, 50),
+        "latency_p95": percentile(wall_times, 95)
+    }
+    return summary
+
+def write_results_to_csv(results, filename):
+    fieldnames = [
+        "turn_id", "logged_action_type", "logged_action_name", "action_type", "action_name",
+        "agrees", "legal", "wall_time", "prompt_tokens", "completion_tokens", "cached_tokens", "cache_hit", "error"
+    ]
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result)
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run logged battle states through a prompt variant and model")
+    parser.add_argument("--logs_dir", type=str, default="./logs", help="Directory containing battle logs")
+    parser.add_argument("--start", type=str, help="Start date for logs (format: YYYYMMDD_HHMMSS)")
+    parser.add_argument("--end", type=str, help="End date for logs (format: YYYYMMDD_HHMMSS)")
+    parser.add_argument("--player", type=str, help="Only use turns played by this player")
+    parser.add_argument("--model", type=str, default="gpt-4o-mini", help="Model to evaluate")
+    parser.add_argument("--mode", type=str, choices=["default", "memory", "opposition"], default="default", help="Move prompt template")
+    parser.add_argument("--backend", type=str, choices=["openai", "local", "batch"], default="openai",
+                        help="openai: live API, local: OpenAI-compatible server at --base_url, batch: write/score a Batch API file")
+    parser.add_argument("--base_url", type=str, default="http://localhost:8000/v1", help="Server URL for the local backend")
+    parser.add_argument("--batch_file", type=str, default="reevaluation_batch.jsonl", help="Batch API input file to write")
+    parser.add_argument("--batch_results", type=str, help="Batch API output file to score instead of writing a batch")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    parser.add_argument("--limit", type=int, help="Maximum number of turns to evaluate")
+    parser.add_argument("--use_cache", action="store_true", help="Reuse cached responses; hits are left out of the latency and token totals")
+    parser.add_argument("--output", type=str, default="reevaluation_results.csv", help="Per-turn results CSV")
+    args = parser.parse_args()
+
+    mode = None if args.mode == "default" else args.mode
+
+    def turns():
+        for count, item in enumerate(get_logged_turns(args.logs_dir, args.start, args.end, args.player)):
+            if args.limit is not None and count >= args.limit:
+                return
+            yield item
+
+    if args.backend == "batch" and not args.batch_results:
+        count = write_batch_file(turns(), args.model, mode, args.batch_file)
+        ic(f"Wrote {count} requests to {args.batch_file}")
+        return
+
+    start = time.perf_counter()
+    if args.backend == "batch":
+        results = score_batch_results(turns(), args.batch_results)
+    else:
+        if args.backend == "local":
+            configure_backend(base_url=args.base_url)
+        backend = ApiBackend(use_cache=args.use_cache)
+        results = asyncio.run(run_evaluation(turns(), backend, args.model, mode, args.concurrency))
+
+    write_results_to_csv(results, args.output)
+    ic(summarize(results))
+    ic(f"Evaluated {len(results)} turns in {time.perf_counter() - start:.1f}s, results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from datetime import datetime
 import argparse
 import re
 import csv
+import math
 
 def get_battle_logs(logs_dir="./logs", start_date=None, end_date=None):
     logs_path = Path(logs_dir)
@@ -28,7 +29,23 @@ def get_battle_logs(logs_dir="./logs", start_date=None, end_date=None):
             ic(f"Error processing {log_file}: {e}")
             continue
 
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers, q in [0, 100]."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
 def get_stats(stats_dict, game_type, start_date, end_date, model=None, player=None):
+    decision_times = []
+    battle_tokens = []
+    battle_cached_tokens = []
+    llm_call_count = 0
+    llm_turns = 0
+    samples_used = []
+    tier_counts = {"base": 0, "escalated": 0}
+
     for battle_log in get_battle_logs(start_date=start_date, end_date=end_date):
         try:
             if battle_log["metadata"]["game_type"] != game_type:
@@ -49,6 +66,8 @@ def get_stats(stats_dict, game_type, start_date, end_date, model=None, player=No
 
             stats_dict["games_played"] += 1
             stats_dict['total_random_moves'] += battle_log["metadata"].get("random_move_count", 0)
+            stats_dict['total_fallback_moves'] += battle_log["metadata"].get("fallback_move_count", 0)
+            stats_dict['total_fast_path_moves'] += battle_log["metadata"].get("fast_path_move_count", 0)
             
             if battle_log["metadata"]["outcome"] == "win":
                 stats_dict["wins"] += 1
@@ -56,7 +75,8 @@ def get_stats(stats_dict, game_type, start_date, end_date, model=None, player=No
                 stats_dict["losses"] += 1
                 # Check if turns exist and there's at least one turn
                 if battle_log.get("turns") and len(battle_log["turns"]) > 0:
-                    last_turn_state = battle_log["turns"][-1].get("battle_state", "")
+                    # Fast path turns are logged without a battle state
+                    last_turn_state = next((turn["battle_state"] for turn in reversed(battle_log["turns"]) if turn.get("battle_state")), "")
                     remaining_pokemon = re.search('Remaining Pokemon: (\d)/', last_turn_state)
                     if remaining_pokemon and int(remaining_pokemon.group(1)) <= 2:
                         stats_dict["close_losses"] += 1
@@ -68,7 +88,21 @@ def get_stats(stats_dict, game_type, start_date, end_date, model=None, player=No
             if not battle_log.get("turns"):
                 continue
 
+            tokens = 0
+            cached_tokens = 0
+            has_telemetry = False
             for turn in battle_log["turns"]:
+                # Latency percentiles cover LLM decisions only, fast path turns take microseconds
+                if turn.get("decision_time") is not None and turn.get("decision_source", "llm") == "llm":
+                    decision_times.append(turn["decision_time"])
+                if turn.get("llm_calls") is not None:
+                    has_telemetry = True
+                    llm_turns += 1
+                    llm_call_count += len(turn["llm_calls"])
+                    for call in turn["llm_calls"]:
+                        tokens += call.get("prompt_tokens", 0) + call.get("completion_tokens", 0)
+                        cached_tokens += call.get("cached_tokens", 0)
+
                 if turn.get("action_type") == "switch":
                     if prev_switch:
                         stats_dict["double_switches"] += 1
@@ -84,6 +118,14 @@ def get_stats(stats_dict, game_type, start_date, end_date, model=None, player=No
                     stats_dict["sc3_turns"] += 1
                     if turn["consensus"]:
                         stats_dict["sc3_consensus_turns"] += 1
+                if turn.get("samples_used") is not None:
+                    samples_used.append(turn["samples_used"])
+                if turn.get("decision_tier") in tier_counts:
+                    tier_counts[turn["decision_tier"]] += 1
+
+            if has_telemetry:
+                battle_tokens.append(tokens)
+                battle_cached_tokens.append(cached_tokens)
 
             total_turns = len(turns)
             if total_turns > 0:
@@ -100,16 +142,29 @@ def get_stats(stats_dict, game_type, start_date, end_date, model=None, player=No
         stats_dict["avg_late_game_switches"] /= stats_dict["games_played"]
         stats_dict["sc3_consensus_percentage"] = stats_dict["sc3_consensus_turns"] / stats_dict["sc3_turns"] * 100 if stats_dict["sc3_turns"] > 0 else 0
         stats_dict["win_percentage"] = stats_dict["wins"] / (stats_dict["games_played"] - stats_dict["error_matches"]) * 100 if (stats_dict["games_played"] - stats_dict["error_matches"]) > 0 else 0
+
+    # LLM latency and token usage, only available for logs with telemetry
+    stats_dict["decision_latency_p50"] = percentile(decision_times, 50)
+    stats_dict["decision_latency_p95"] = percentile(decision_times, 95)
+    stats_dict["decision_latency_p99"] = percentile(decision_times, 99)
+    stats_dict["avg_tokens_per_battle"] = sum(battle_tokens) / len(battle_tokens) if battle_tokens else 0
+    stats_dict["avg_cached_tokens_per_battle"] = sum(battle_cached_tokens) / len(battle_cached_tokens) if battle_cached_tokens else 0
+    stats_dict["avg_llm_calls_per_turn"] = llm_call_count / llm_turns if llm_turns > 0 else 0
+    stats_dict["avg_samples_per_turn"] = sum(samples_used) / len(samples_used) if samples_used else 0
+    tier_turns = sum(tier_counts.values())
+    stats_dict["escalation_percentage"] = tier_counts["escalated"] / tier_turns * 100 if tier_turns > 0 else 0
     
     return stats_dict
 
 def write_stats_to_csv(all_stats, filename="pokemon_battle_stats.csv"):
     fieldnames = [
         "player", "model", "game_type", "games_played", "wins", "losses", 
-        "win_percentage", "error_matches", "total_random_moves", "total_attacks",
+        "win_percentage", "error_matches", "total_random_moves", "total_fallback_moves", "total_fast_path_moves", "total_attacks",
         "total_switches", "double_switches", "close_losses", "total_defeats",
         "avg_turns", "avg_late_game_switches", "sc3_consensus_percentage",
-        "sc3_consensus_turns", "sc3_turns"
+        "sc3_consensus_turns", "sc3_turns", "decision_latency_p50", "decision_latency_p95",
+        "decision_latency_p99", "avg_tokens_per_battle", "avg_cached_tokens_per_battle",
+        "avg_llm_calls_per_turn", "avg_samples_per_turn", "escalation_percentage"
     ]
     
     with open(filename, 'w', newline='') as csvfile:
@@ -137,14 +192,17 @@ def stats(start_date='20241030_000000', end_date='20250101_000000', model=None,
 
     stats_template = {
         "games_played": 0, "wins": 0, "losses": 0, "win_percentage": 0,
-        "error_matches": 0, "total_random_moves": 0, "total_attacks": 0,
+        "error_matches": 0, "total_random_moves": 0, "total_fallback_moves": 0, "total_fast_path_moves": 0, "total_attacks": 0,
         "total_switches": 0, "double_switches": 0, "close_losses": 0,
         "total_defeats": 0, "avg_turns": 0, "avg_late_game_switches": 0,
-        "sc3_consensus_percentage": 0, "sc3_consensus_turns": 0, "sc3_turns": 0
+        "sc3_consensus_percentage": 0, "sc3_consensus_turns": 0, "sc3_turns": 0,
+        "decision_latency_p50": 0, "decision_latency_p95": 0, "decision_latency_p99": 0,
+        "avg_tokens_per_battle": 0, "avg_cached_tokens_per_battle": 0, "avg_llm_calls_per_turn": 0,
+        "avg_samples_per_turn": 0, "escalation_percentage": 0
     }
 
     all_stats = []
-    players = ['LoggingPlayer', 'SC3Player', 'MemoryPlayer', 'OppositionPlayer', 'InitialStrategyPlayer']
+    players = ['LoggingPlayer', 'SCkPlayer', 'SC3Player', 'CascadePlayer', 'MemoryPlayer', 'OppositionPlayer', 'InitialStrategyPlayer']
     models = ['gpt-4o', 'gpt-4o-mini']
     game_types = ['local', 'ladder']
 